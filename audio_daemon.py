@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import os
+import socket
+import time
+
+from utils.audio_ipc import (DEFAULT_SOCKET, REQUEST, ACK, PING, STATUS_OK,
+                             STATUS_UNKNOWN)
+from utils.instrumentation import Instrumentation
+from utils.player import PlaylistPlayer
+from utils.shutdown import StopSignal
+
+# playlist of songs
+PLAYLIST = ['songs/howLong.mp3', 'songs/godIsAWoman.mp3',
+            'songs/tillTheWorldEnds.mp3', 'songs/thatsWhatILike.mp3',
+            'songs/24kMagic.mp3', 'songs/the_difference.mp3',
+            'songs/sunshine.mp3']
+
+
+def main():
+    args = get_args()
+
+    player = PlaylistPlayer(args.songs or PLAYLIST, args.volume)
+    server = listen(args.socket)
+    stop = StopSignal(args.control_socket)
+    instrumentation = Instrumentation()
+    print('listening on ' + args.socket)
+
+    try:
+        serve(server, player, stop, instrumentation, args.stats_interval)
+    finally:
+        server.close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        stop.close()
+        player.close()
+        print(json.dumps(instrumentation.report(), indent=2))
+
+
+def listen(path):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    server.bind(path)
+    # wake up regularly to notice a stop request
+    server.settimeout(0.5)
+    return server
+
+
+def serve(server, player, stop, instrumentation, stats_interval=0.0):
+    while not stop.is_set():
+        try:
+            data, address = server.recvfrom(REQUEST.size)
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+        received = time.monotonic()
+        if len(data) != REQUEST.size:
+            continue
+        seq, command, sent = REQUEST.unpack(data)
+
+        ##################################################################
+        if command == PING or player.apply(command):
+            status = STATUS_OK
+        else:
+            status = STATUS_UNKNOWN
+        applied = time.monotonic()
+
+        # clients that did not bind a reply address get no ack
+        if address:
+            try:
+                server.sendto(ACK.pack(seq, command, status, sent, received,
+                                       applied), address)
+            except OSError:
+                pass
+
+        instrumentation.record('queued', received - sent)
+        instrumentation.record('apply', applied - received)
+        if stats_interval > 0:
+            instrumentation.dump_if_due(stats_interval)
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('songs', nargs='*',
+                        help='playlist, the songs/ directory by default')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET,
+                        help='unix datagram socket the commands arrive on')
+    parser.add_argument('--volume', type=int, default=40)
+    parser.add_argument('--control-socket', default=None,
+                        help='unix socket path that accepts a "stop" command')
+    parser.add_argument('--stats-interval', type=float, default=0.0,
+                        help='seconds between latency dumps (0 disables)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.gpio_events import EdgeReceiver  # noqa
+from utils.instrumentation import Instrumentation  # noqa
+
+
+class SoftwareGPIO(object):
+    # stands in for RPi.GPIO off the Pi: fire() calls the edge callback
+    # from its own thread, like the RPi.GPIO event thread does
+    FALLING = 'falling'
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def add_event_detect(self, pin, edge, callback, **kwargs):
+        self.callbacks[pin] = callback
+
+    def fire(self, pin):
+        self.callbacks[pin](pin)
+
+
+def idle_spin(seconds):
+    # the old `while (True):` loop with nothing but a string in its body
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        """the body of the old loop"""
+
+
+def idle_receiver(seconds):
+    receiver = EdgeReceiver(SoftwareGPIO())
+    receiver.on_falling(17, lambda pin: None)
+    stop = threading.Event()
+    threading.Timer(seconds, stop.set).start()
+    receiver.run(stop)
+
+
+def idle_cpu(target, seconds):
+    # CPU time of a child process that only waits, as a share of one core
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.monotonic()
+    process = multiprocessing.Process(target=target, args=(seconds,))
+    process.start()
+    process.join()
+    wall = time.monotonic() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = ((after.ru_utime - before.ru_utime) +
+           (after.ru_stime - before.ru_stime))
+    return 100.0 * cpu / wall
+
+
+def edge_latency(edges, gpio=None, loopback=None, seed=0):
+    # software edges by default; with loopback=(out_pin, in_pin) the
+    # output pin is driven low and the edge comes back through RPi.GPIO
+    instrumentation = Instrumentation()
+    if loopback is None:
+        gpio = SoftwareGPIO()
+        pin = 17
+    else:
+        out_pin, pin = loopback
+        gpio.setmode(gpio.BCM)
+        gpio.setup(out_pin, gpio.OUT, initial=gpio.HIGH)
+        gpio.setup(pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+
+    receiver = EdgeReceiver(gpio, instrumentation=instrumentation)
+    driven = {}
+
+    def action(channel):
+        instrumentation.record('drive_to_action',
+                               time.perf_counter() - driven['at'])
+
+    receiver.on_falling(pin, action)
+
+    def drive():
+        rng = np.random.default_rng(seed)
+        for _ in range(edges):
+            # idle gaps, so every edge finds the receiver asleep
+            time.sleep(rng.uniform(0.002, 0.02))
+            driven['at'] = time.perf_counter()
+            if loopback is None:
+                gpio.fire(pin)
+            else:
+                gpio.output(out_pin, gpio.LOW)
+                time.sleep(0.001)
+                gpio.output(out_pin, gpio.HIGH)
+        time.sleep(0.1)
+        receiver.close()
+
+    threading.Thread(target=drive, daemon=True).start()
+    receiver.run()
+    if loopback is not None:
+        gpio.cleanup()
+    return instrumentation.report()
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='idle CPU and edge-to-action latency of the GPIO '
+                    'receiver loop in gpio.py')
+    parser.add_argument('--idle', type=float, default=5.0,
+                        help='seconds each idle variant runs')
+    parser.add_argument('--edges', type=int, default=500)
+    parser.add_argument('--loopback', type=int, nargs=2, default=None,
+                        metavar=('OUT_PIN', 'IN_PIN'),
+                        help='real edges on a Pi, OUT_PIN wired to IN_PIN')
+    parser.add_argument('--output', default=None, help='write results JSON')
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    print('{:<30}{:>10}'.format('idle loop', 'cpu %'))
+    idle = {}
+    for name, target in (('spin', idle_spin),
+                         ('edge_receiver', idle_receiver)):
+        idle[name] = idle_cpu(target, args.idle)
+        print('{:<30}{:>10.2f}'.format(name, idle[name]))
+
+    gpio = None
+    if args.loopback:
+        import RPi.GPIO as gpio
+    latency = edge_latency(args.edges, gpio, args.loopback)
+
+    print('\n{:<30}{:>10}{:>10}{:>10}{:>10}'.format(
+        'latency', 'p50 us', 'p95 us', 'p99 us', 'max us'))
+    for name in ('edge_to_action', 'drive_to_action'):
+        result = latency[name]
+        print('{:<30}{:>10.1f}{:>10.1f}{:>10.1f}{:>10.1f}'.format(
+            name, result['p50_ms'] * 1000.0, result['p95_ms'] * 1000.0,
+            result['p99_ms'] * 1000.0, result['max_ms'] * 1000.0))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'platform': platform.platform(),
+                'edges': 'loopback' if args.loopback else 'software',
+                'idle_cpu_percent': idle,
+                'latency': latency,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.landmarks import (landmarks_to_array, calc_bounding_rect,  # noqa
+                             calc_landmark_list, pre_process_landmark)
+from utils.classifier import KeypointClassifier  # noqa
+from utils.augment import KeypointAugmenter  # noqa
+from utils.render import draw_landmarks  # noqa
+from utils.preprocess import FramePreprocessor  # noqa
+from utils.generate_commands import (CommandGenerator,  # noqa
+                                     create_multi_hand_decoder)
+
+IMAGE_WIDTH = 960
+IMAGE_HEIGHT = 540
+
+CASES = []
+
+
+def case(name):
+    def register(setup):
+        CASES.append((name, setup))
+        return setup
+    return register
+
+
+def load_dataset(path, synthetic):
+    data = np.loadtxt(path, delimiter=',', dtype=np.float32)
+    labels, features = data[:, 0].astype(np.int32), data[:, 1:]
+
+    # place the recorded (wrist relative, max-abs normalized) hands back
+    # into normalized image coordinates, plus random synthetic hands
+    rng = np.random.default_rng(0)
+    points = features.reshape(-1, 21, 2)
+    scale = rng.uniform(0.1, 0.3, (len(points), 1, 1))
+    centre = rng.uniform(0.3, 0.7, (len(points), 1, 2))
+    points = centre + points * scale / (1.0, IMAGE_HEIGHT / IMAGE_WIDTH)
+    random_points = rng.uniform(0.0, 1.0, (synthetic, 21, 2))
+    points = np.concatenate((points, random_points)).astype(np.float32)
+
+    hands = [types.SimpleNamespace(landmark=[
+        types.SimpleNamespace(x=float(x), y=float(y), z=0.0) for x, y in hand])
+        for hand in points]
+    return labels, features, points, hands
+
+
+def cycle(items):
+    state = {'index': 0}
+
+    def next_item():
+        index = state['index']
+        state['index'] = (index + 1) % len(items)
+        return items[index]
+    return next_item
+
+
+@case('landmarks_to_array')
+def bench_landmarks_to_array(data):
+    next_hand = cycle(data['hands'])
+    return lambda: landmarks_to_array(next_hand())
+
+
+@case('calc_bounding_rect')
+def bench_calc_bounding_rect(data):
+    next_points = cycle(data['points'])
+    return lambda: calc_bounding_rect(next_points(), IMAGE_WIDTH, IMAGE_HEIGHT)
+
+
+@case('calc_landmark_list')
+def bench_calc_landmark_list(data):
+    next_points = cycle(data['points'])
+    return lambda: calc_landmark_list(next_points(), IMAGE_WIDTH, IMAGE_HEIGHT)
+
+
+@case('pre_process_landmark')
+def bench_pre_process_landmark(data):
+    next_points = cycle(data['points'])
+    return lambda: pre_process_landmark(
+        next_points(), IMAGE_WIDTH, IMAGE_HEIGHT)
+
+
+@case('pre_process_landmark_batch64')
+def bench_pre_process_landmark_batch(data):
+    batches = [data['points'][i:i + 64] for i in
+               range(0, len(data['points']) - 63, 64)]
+    next_batch = cycle(batches)
+    return lambda: pre_process_landmark(
+        next_batch(), IMAGE_WIDTH, IMAGE_HEIGHT)
+
+
+@case('classifier.predict')
+def bench_classifier_predict(data):
+    classifier = KeypointClassifier(data['model'])
+    next_features = cycle(data['features'])
+    return lambda: classifier.predict(next_features())
+
+
+@case('classifier.predict_proba')
+def bench_classifier_predict_proba(data):
+    classifier = KeypointClassifier(data['model'])
+    next_features = cycle(data['features'])
+    return lambda: classifier.predict_proba(next_features())
+
+
+@case('classifier.predict_batch64')
+def bench_classifier_predict_batch(data):
+    classifier = KeypointClassifier(data['model'])
+    features = data['features']
+    next_batch = cycle([features[i:i + 64] for i in
+                        range(0, len(features) - 63, 64)])
+    return lambda: classifier.predict(next_batch())
+
+
+@case('sklearn.predict')
+def bench_sklearn_predict(data):
+    try:
+        import pickle
+        import sklearn  # noqa
+    except ImportError:
+        return None
+    with open(data['sklearn_model'], 'rb') as f:
+        model = pickle.load(f)
+    next_features = cycle(data['features'])
+    return lambda: model.predict(next_features().reshape(1, -1))[0]
+
+
+def bench_command_window(data, deque_size):
+    # a clock that is always past the cooldown, and the recorded labels
+    # in turn so none reaches the vote threshold: the window stays full
+    # and every call appends, evicts and votes
+    ticks = itertools.count(step=10)
+    commander = CommandGenerator(deque_size=deque_size,
+                                 clock=lambda: next(ticks))
+    next_label = cycle(sorted(set(data['labels'])))
+
+    def step():
+        commander.add_gestures(next_label())
+        return commander.get_command()
+
+    for _ in range(2 * deque_size):
+        if step() != -1:
+            raise RuntimeError('a command fired, the window was cleared')
+    return step
+
+
+@case('CommandGenerator.add_get')
+def bench_command_generator(data):
+    return bench_command_window(data, 10)
+
+
+@case('CommandGenerator.add_get_window300')
+def bench_command_generator_window(data):
+    return bench_command_window(data, 300)
+
+
+@case('KeypointAugmenter.augment_4096')
+def bench_augment(data):
+    augmenter = KeypointAugmenter(seed=0)
+    features = np.resize(data['features'], (4096, data['features'].shape[1]))
+    out = np.empty_like(features)
+    return lambda: augmenter.augment(features, out=out)
+
+
+def bench_multi_hand(data, hands):
+    classifier = KeypointClassifier(data['model'])
+    commander = create_multi_hand_decoder('vote', classifier.classes)
+    points = data['points']
+    # hands spread across the frame so every one keeps its own track
+    offsets = np.linspace(-0.3, 0.3, hands, dtype=np.float32)
+    offsets = offsets.reshape(-1, 1, 1)
+    frames = [points[i] * 0.5 + offsets for i in range(len(points))]
+    next_frame = cycle(frames)
+
+    def step():
+        frame = next_frame()
+        features = pre_process_landmark(frame, IMAGE_WIDTH, IMAGE_HEIGHT)
+        commander.classify(classifier, features, frame)
+        return commander.get_commands()
+    return step
+
+
+@case('MultiHandDecoder.classify_1hand')
+def bench_multi_hand_1(data):
+    return bench_multi_hand(data, 1)
+
+
+@case('MultiHandDecoder.classify_4hands')
+def bench_multi_hand_4(data):
+    return bench_multi_hand(data, 4)
+
+
+@case('draw_landmarks')
+def bench_draw_landmarks(data):
+    image = np.zeros((IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8)
+    next_pixels = cycle([calc_landmark_list(points, IMAGE_WIDTH, IMAGE_HEIGHT)
+                         for points in data['points']])
+    return lambda: draw_landmarks(image, next_pixels())
+
+
+@case('draw_landmarks_4hands')
+def bench_draw_landmarks_hands(data):
+    image = np.zeros((IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8)
+    pixels = calc_landmark_list(data['points'], IMAGE_WIDTH, IMAGE_HEIGHT)
+    next_pixels = cycle([pixels[i:i + 4] for i in
+                         range(0, len(pixels) - 3, 4)])
+    return lambda: draw_landmarks(image, next_pixels())
+
+
+@case('FramePreprocessor.process')
+def bench_frame_preprocessor(data):
+    # measure() runs it under tracemalloc: the reused buffers should leave
+    # nothing retained once the first frame has sized them
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (IMAGE_HEIGHT, IMAGE_WIDTH, 3),
+                           dtype=np.uint8) for _ in range(2)]
+    preprocessor = FramePreprocessor()
+    next_frame = cycle(frames)
+    preprocessor.process(next_frame())
+    return lambda: preprocessor.process(next_frame())
+
+
+def timer_overhead_ns(count=10000):
+    clock = time.perf_counter_ns
+    samples = np.empty(count)
+    for index in range(count):
+        start = clock()
+        samples[index] = clock() - start
+    return float(np.median(samples))
+
+
+def measure(func, number, repeat, overhead_ns=0.0):
+    for _ in range(number):
+        func()
+
+    # every call timed on its own, so the percentiles are per-call tail
+    # latency rather than percentiles of batch means
+    clock = time.perf_counter_ns
+    samples = np.empty(number * repeat)
+    for index in range(len(samples)):
+        start = clock()
+        func()
+        samples[index] = clock() - start
+    samples = np.maximum(samples - overhead_ns, 0.0) / 1000.0
+
+    # allocations are measured in a separate pass, tracemalloc is slow
+    tracemalloc.start()
+    func()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    for _ in range(number - 1):
+        func()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'mean_us': float(samples.mean()),
+        'min_us': float(samples.min()),
+        'p50_us': float(np.percentile(samples, 50)),
+        'p95_us': float(np.percentile(samples, 95)),
+        'p99_us': float(np.percentile(samples, 99)),
+        'peak_alloc_bytes': int(max(peak - before, 0)),
+        'retained_bytes_per_call': (after - before) / number,
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    print('\n{:<30}{:>12}{:>12}{:>9}'.format(
+        'case', 'base p50', 'new p50', 'ratio'))
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['p50_us'] / baseline[name]['p50_us']
+        flag = ''
+        if ratio > 1.0 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print('{:<30}{:>12.2f}{:>12.2f}{:>9.2f}{}'.format(
+            name, baseline[name]['p50_us'], result['p50_us'], ratio, flag))
+    return regressions
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmarks for the per-frame hot path')
+    parser.add_argument('--dataset',
+                        default=os.path.join(ROOT, 'example_data',
+                                             'keypoint.csv'))
+    parser.add_argument('--model',
+                        default=os.path.join(ROOT, 'models',
+                                             'logreg_complete.npz'))
+    parser.add_argument('--sklearn-model',
+                        default=os.path.join(ROOT, 'models',
+                                             'logreg_complete.pkl'))
+    parser.add_argument('--synthetic', type=int, default=500,
+                        help='random synthetic hands added to the dataset')
+    parser.add_argument('--number', type=int, default=200,
+                        help='calls per round')
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='rounds per case, every call is timed on its own')
+    parser.add_argument('--filter', default=None,
+                        help='only run cases whose name contains this')
+    parser.add_argument('--output', default=None, help='write results JSON')
+    parser.add_argument('--compare', default=None,
+                        help='results JSON from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='p50 slowdown that counts as a regression')
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    labels, features, points, hands = load_dataset(args.dataset,
+                                                   args.synthetic)
+    data = {
+        'labels': labels.tolist(),
+        'features': features,
+        'points': points,
+        'hands': hands,
+        'model': args.model,
+        'sklearn_model': args.sklearn_model,
+    }
+
+    print('{:<30}{:>10}{:>10}{:>10}{:>10}{:>12}'.format(
+        'case', 'p50 us', 'p95 us', 'p99 us', 'mean us', 'peak bytes'))
+    # subtracted from every sample
+    overhead_ns = timer_overhead_ns()
+    results = {}
+    for name, setup in CASES:
+        if args.filter and args.filter not in name:
+            continue
+        func = setup(data)
+        if func is None:
+            print('{:<30}skipped'.format(name))
+            continue
+        result = measure(func, args.number, args.repeat, overhead_ns)
+        results[name] = result
+        print('{:<30}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}{:>12}'.format(
+            name, result['p50_us'], result['p95_us'], result['p99_us'],
+            result['mean_us'], result['peak_alloc_bytes']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'platform': platform.platform(),
+                'timer_overhead_ns': overhead_ns,
+                'results': results,
+            }, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
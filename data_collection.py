@@ -1,15 +1,18 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import csv
-import copy
-import itertools
+import argparse
 
 import cv2 as cv
-import numpy as np
 import mediapipe as mp
 
+from utils.preprocess import FramePreprocessor
+from utils.landmarks import landmarks_to_array, pre_process_landmark
+from utils.dataset import DatasetWriter
+
 
 def main():
+    args = get_args()
+
     cap_device = 0
     cap_width = 960
     cap_height = 540
@@ -32,8 +35,28 @@ def main():
 
 
     #########################################################################
+    preprocessor = FramePreprocessor()
+    # rows are written from a background thread, not once per frame
+    writer = DatasetWriter(args.output)
+
     mode = 0
 
+    try:
+        record(cap, hands, preprocessor, writer, mode)
+    finally:
+        writer.close()
+        print('saved {} rows to {}'.format(writer.rows_written, args.output))
+
+    cap.release()
+    cv.destroyAllWindows()
+
+    if args.update_model:
+        from utils.online import OnlineTrainer
+        rows = OnlineTrainer(args.update_model).update(args.output)
+        print('updated {} with {} new rows'.format(args.update_model, rows))
+
+
+def record(cap, hands, preprocessor, writer, mode):
     while True:
 
         ##################################################
@@ -46,11 +69,10 @@ def main():
         ret, image = cap.read()
         if not ret:
             break
-        image = cv.flip(image, 1)
-        debug_image = copy.deepcopy(image)
 
         ##############################################################
-        image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+        debug_image, image = preprocessor.process(image)
+        image_height, image_width = debug_image.shape[:2]
 
         image.flags.writeable = False
         results = hands.process(image)
@@ -61,18 +83,26 @@ def main():
             for hand_landmarks, handedness in zip(results.multi_hand_landmarks,
                                                   results.multi_handedness):
 
-                landmark_list = calc_landmark_list(debug_image, hand_landmarks)
+                landmark_array = landmarks_to_array(hand_landmarks)
 
                 pre_processed_landmark_list = pre_process_landmark(
-                    landmark_list)
+                    landmark_array, image_width, image_height)
 
-                logging_csv(number, mode, pre_processed_landmark_list)
+                logging_csv(writer, number, mode, pre_processed_landmark_list)
 
         ##############################################################
         cv.imshow('Hand Gesture Training', debug_image)
 
-    cap.release()
-    cv.destroyAllWindows()
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', default='data/keypoints.csv',
+                        help='.csv, or any other extension for the binary '
+                             'record format')
+    parser.add_argument('--update-model', default=None, metavar='CHECKPOINT',
+                        help='feed the new rows to this online model '
+                             '(see train_online.py) when recording stops')
+    return parser.parse_args()
 
 
 def select_mode(key, mode):
@@ -87,46 +117,7 @@ def select_mode(key, mode):
     return number, mode
 
 
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_point = []
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-        # landmark_z = landmark.z
-
-        landmark_point.append([landmark_x, landmark_y])
-
-    return landmark_point
-
-
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
-
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
-
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
-
-    temp_landmark_list = list(
-        itertools.chain.from_iterable(temp_landmark_list))
-
-    max_value = max(list(map(abs, temp_landmark_list)))
-
-    def normalize_(n):
-        return n / max_value
-
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
-
-    return temp_landmark_list
-
-
-def logging_csv(number, mode, landmark_list):
+def logging_csv(writer, number, mode, landmark_list):
     print("mode: " + str(mode) + "   number: " + str(number))
     if mode == 0:
         pass
@@ -140,10 +131,7 @@ def logging_csv(number, mode, landmark_list):
         5: horns up 
         6: horns down
         '''
-        csv_path = 'data/keypoints.csv'
-        with open(csv_path, 'a', newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([number, *landmark_list])
+        writer.write(number, landmark_list)
     return
 
 
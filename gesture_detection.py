@@ -1,19 +1,36 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import csv
-import copy
-import itertools
-import pickle
-
-import cv2 as cv
-import numpy as np
-import mediapipe as mp
-
-from utils import CvFpsCalc
-from utils.generate_commands import CommandGenerator
+import time
+
+# the startup timeline counts from here, before the heavy imports
+BOOT_TIME = time.perf_counter()
+
+import argparse  # noqa: E402
+import csv  # noqa: E402
+
+import cv2 as cv  # noqa: E402
+
+from utils import CvFpsCalc  # noqa: E402
+from utils.camera import CameraStream  # noqa: E402
+from utils.preprocess import FramePreprocessor  # noqa: E402
+from utils.landmarks import (hands_to_array, calc_bounding_rect,  # noqa: E402
+                             calc_landmark_list, pre_process_landmark)
+from utils.classifier import KeypointClassifier  # noqa: E402
+from utils.generate_commands import (create_multi_hand_decoder,  # noqa: E402
+                                     DECODERS)
+from utils.startup import (StartupTimeline,  # noqa: E402
+                           run_parallel, create_hands)
+from utils.scheduler import InferenceScheduler  # noqa: E402
+from utils.roi import RoiTracker  # noqa: E402
+from utils.shutdown import StopSignal  # noqa: E402
+from utils.instrumentation import Instrumentation  # noqa: E402
+from utils.render import draw_landmarks  # noqa: E402
+from utils.display import DisplayThread, display_available  # noqa: E402
 
 
 def main():
+    args = get_args()
+
     cap_device = 0
     cap_width = 960
     cap_height = 540
@@ -24,24 +41,29 @@ def main():
 
     use_brect = True
 
-    ################################################################
-    cap = cv.VideoCapture(cap_device)
-    cap.set(cv.CAP_PROP_FRAME_WIDTH, cap_width)
-    cap.set(cv.CAP_PROP_FRAME_HEIGHT, cap_height)
-
-    ##############################################################
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        static_image_mode=use_static_image_mode,
-        max_num_hands=1,
-        min_detection_confidence=min_detection_confidence,
-        min_tracking_confidence=min_tracking_confidence,
-    )
+    timeline = StartupTimeline(BOOT_TIME)
 
-    filename = 'models/logreg_complete.pkl'
-    model = pickle.load(open(filename, 'rb'))
-
-    commander = CommandGenerator()
+    ################################################################
+    cap, hands, classifier = run_parallel(timeline, [
+        ('camera', lambda: CameraStream(
+            cap_device, cap_width, cap_height).start()),
+        ('hands', lambda: create_hands(
+            static_image_mode=use_static_image_mode,
+            max_num_hands=args.max_hands,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            warmup_shape=(cap_height, cap_width, 3),
+        )),
+        ('classifier', lambda: KeypointClassifier(args.model)),
+    ])
+
+    process = hands.process
+    if args.roi:
+        process = RoiTracker(process).process
+    # skip most frames while nobody is in view
+    scheduler = InferenceScheduler(process)
+
+    commander = create_multi_hand_decoder(args.decoder, classifier.classes)
 
     ############################################################
     with open('models/keypoint_classifier_label.csv',
@@ -56,64 +78,145 @@ def main():
     cvFpsCalc = CvFpsCalc(buffer_len=10)
 
     #########################################################################
+    preprocessor = FramePreprocessor()
+
     mode = 0
 
-    while True:
+    instrumentation = Instrumentation()
+    frame_timer = instrumentation.timer()
+    instrumentation.add_gauge('preprocess alloc',
+                              preprocessor.allocation_text)
+    instrumentation.add_gauge('scheduler', scheduler.metrics_text)
+
+    stop = StopSignal(args.control_socket)
+    number = -1
+
+    # drawing and cv.imshow run on their own thread at --display-fps
+    display = None
+    if not args.headless and display_available():
+        display = DisplayThread(render, 'Hand Gesture Recognition',
+                                max_fps=args.display_fps).start()
+
+    while not stop.is_set():
         fps = cvFpsCalc.get()
+        frame_timer.start()
 
         ##################################################
-        key = cv.waitKey(10)
-        if key == 27:  # ESC
-            break
-        number, mode = select_mode(key, mode)
+        if display is not None:
+            key = display.poll_key()
+            if key == 27:  # ESC
+                break
+            number, mode = select_mode(key, mode)
 
         ######################################################
-        ret, image = cap.read()
+        # bounded, so a camera that stalls without failing cannot keep
+        # the loop from noticing a stop request
+        ret, image = cap.read(timeout=0.5)
         if not ret:
+            if cap.running:
+                continue
             break
-        image = cv.flip(image, 1)  # ミラー表示
-        debug_image = copy.deepcopy(image)
+        frame_timer.lap('capture')
 
         ##############################################################
-        image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+        debug_image, image = preprocessor.process(image)
+        image_height, image_width = debug_image.shape[:2]
+        frame_timer.lap('preprocess')
 
         image.flags.writeable = False
-        results = hands.process(image)
+        results = scheduler.process(image)
         image.flags.writeable = True
+        frame_timer.lap('hands')
 
-        #####################################################################
-        if results.multi_hand_landmarks is not None:
-            for hand_landmarks, handedness in zip(results.multi_hand_landmarks,
-                                                  results.multi_handedness):
-
-                brect = calc_bounding_rect(debug_image, hand_landmarks)
-
-                landmark_list = calc_landmark_list(debug_image, hand_landmarks)
-
-                pre_processed_landmark_list = pre_process_landmark(
-                    landmark_list)
+        if timeline.mark_once('first_frame'):
+            print(timeline.report())
+        if args.watch_model and classifier.reload_if_changed():
+            print('reloaded ' + args.model)
 
-
-                hand_sign_id = model.predict(pre_processed_landmark_list.reshape(1,-1))[0]
-                commander.add_gestures(hand_sign_id)
-                # print(commander.get_command())
-
-                debug_image = draw_bounding_rect(use_brect, debug_image, brect)
-                debug_image = draw_landmarks(debug_image, landmark_list)
-                debug_image = draw_info_text(
-                    debug_image,
-                    brect,
-                    handedness,
-                    keypoint_classifier_labels[hand_sign_id]
-                )
-
-        debug_image = draw_info(debug_image, fps, mode, number)
+        #####################################################################
+        if results is not None:
+            points = hands_to_array(results.multi_hand_landmarks)
+            features = pre_process_landmark(points, image_width, image_height)
+            # all hands go through the classifier in one call, the command
+            # state is kept per tracked hand
+            hand_sign_ids = commander.classify(classifier, features, points)
+            overlay_hands = (points, results.multi_handedness or [],
+                             [keypoint_classifier_labels[hand_sign_id] for
+                              hand_sign_id in hand_sign_ids])
+            # print(commander.get_commands())
+            frame_timer.lap('classify')
+
+        if display is None:
+            if args.stats_interval > 0:
+                instrumentation.dump_if_due(args.stats_interval)
+            continue
 
         ##############################################################
-        cv.imshow('Hand Gesture Recognition', debug_image)
+        if display.due():
+            if results is None:
+                overlay_hands = ((), (), ())
+            display.submit(debug_image, dict(
+                hands=overlay_hands,
+                use_brect=use_brect,
+                fps=fps,
+                mode=mode,
+                number=number,
+                status=scheduler.status_text(),
+                stats=instrumentation.overlay_lines(),
+            ))
+            frame_timer.lap('display')
 
     cap.release()
-    cv.destroyAllWindows()
+    stop.close()
+    if display is not None:
+        display.stop()
+
+
+def render(image, overlay):
+    points, handedness, hand_sign_texts = overlay['hands']
+    if len(points):
+        image_height, image_width = image.shape[:2]
+        brects = calc_bounding_rect(points, image_width, image_height)
+        # every hand's skeleton in one pass
+        image = draw_landmarks(image, calc_landmark_list(
+            points, image_width, image_height))
+        for index, hand_sign_text in enumerate(hand_sign_texts):
+            image = draw_bounding_rect(overlay['use_brect'], image,
+                                       brects[index])
+            image = draw_info_text(image, brects[index], handedness[index],
+                                   hand_sign_text)
+
+    return draw_info(image, overlay['fps'], overlay['mode'],
+                     overlay['number'], overlay['status'], overlay['stats'])
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--roi', action='store_true',
+                        help='run MediaPipe on a window around the last '
+                             'detected hand')
+    parser.add_argument('--headless', action='store_true',
+                        help='no preview window and no cv.waitKey in the loop')
+    parser.add_argument('--control-socket', default=None,
+                        help='unix socket path that accepts a "stop" command')
+    parser.add_argument('--model', default='models/logreg_complete.npz',
+                        help='.npz classifier written by train.py')
+    parser.add_argument('--watch-model', action='store_true',
+                        help='reload the model when it changes on disk, '
+                             'e.g. after train_online.py')
+    parser.add_argument('--max-hands', type=int, default=1,
+                        help='hands tracked per frame, each with its own '
+                             'command state')
+    parser.add_argument('--decoder', choices=DECODERS, default='vote',
+                        help='vote: majority of the last hard labels, '
+                             'posterior: smoothed class probabilities')
+    parser.add_argument('--display-fps', type=float, default=15.0,
+                        help='preview refresh cap, drawn on its own thread '
+                             '(0 for every frame)')
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help='seconds between stage latency dumps when there '
+                             'is no preview (0 disables)')
+    return parser.parse_args()
 
 
 def select_mode(key, mode):
@@ -129,244 +232,6 @@ def select_mode(key, mode):
     return number, mode
 
 
-def calc_bounding_rect(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_array = np.empty((0, 2), int)
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-
-        landmark_point = [np.array((landmark_x, landmark_y))]
-
-        landmark_array = np.append(landmark_array, landmark_point, axis=0)
-
-    x, y, w, h = cv.boundingRect(landmark_array)
-
-    return [x, y, x + w, y + h]
-
-
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_point = []
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-        # landmark_z = landmark.z
-
-        landmark_point.append([landmark_x, landmark_y])
-
-    return landmark_point
-
-
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
-
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
-
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
-
-    temp_landmark_list = list(
-        itertools.chain.from_iterable(temp_landmark_list))
-
-    max_value = max(list(map(abs, temp_landmark_list)))
-
-    def normalize_(n):
-        return n / max_value
-
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
-
-    return np.array(temp_landmark_list)
-
-
-def draw_landmarks(image, landmark_point):
-    if len(landmark_point) > 0:
-        cv.line(image, tuple(landmark_point[2]), tuple(landmark_point[3]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[2]), tuple(landmark_point[3]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[3]), tuple(landmark_point[4]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[3]), tuple(landmark_point[4]),
-                (255, 255, 255), 2)
-
-        cv.line(image, tuple(landmark_point[5]), tuple(landmark_point[6]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[5]), tuple(landmark_point[6]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[6]), tuple(landmark_point[7]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[6]), tuple(landmark_point[7]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[7]), tuple(landmark_point[8]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[7]), tuple(landmark_point[8]),
-                (255, 255, 255), 2)
-
-        cv.line(image, tuple(landmark_point[9]), tuple(landmark_point[10]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[9]), tuple(landmark_point[10]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[10]), tuple(landmark_point[11]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[10]), tuple(landmark_point[11]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[11]), tuple(landmark_point[12]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[11]), tuple(landmark_point[12]),
-                (255, 255, 255), 2)
-
-        cv.line(image, tuple(landmark_point[13]), tuple(landmark_point[14]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[13]), tuple(landmark_point[14]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[14]), tuple(landmark_point[15]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[14]), tuple(landmark_point[15]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[15]), tuple(landmark_point[16]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[15]), tuple(landmark_point[16]),
-                (255, 255, 255), 2)
-
-        cv.line(image, tuple(landmark_point[17]), tuple(landmark_point[18]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[17]), tuple(landmark_point[18]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[18]), tuple(landmark_point[19]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[18]), tuple(landmark_point[19]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[19]), tuple(landmark_point[20]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[19]), tuple(landmark_point[20]),
-                (255, 255, 255), 2)
-
-        cv.line(image, tuple(landmark_point[0]), tuple(landmark_point[1]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[0]), tuple(landmark_point[1]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[1]), tuple(landmark_point[2]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[1]), tuple(landmark_point[2]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[2]), tuple(landmark_point[5]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[2]), tuple(landmark_point[5]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[5]), tuple(landmark_point[9]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[5]), tuple(landmark_point[9]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[9]), tuple(landmark_point[13]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[9]), tuple(landmark_point[13]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[13]), tuple(landmark_point[17]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[13]), tuple(landmark_point[17]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[17]), tuple(landmark_point[0]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[17]), tuple(landmark_point[0]),
-                (255, 255, 255), 2)
-
-    for index, landmark in enumerate(landmark_point):
-        if index == 0:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 1:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 2:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 3:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 4:
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-        if index == 5:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 6:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 7:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 8:
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-        if index == 9:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 10:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 11:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 12:
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-        if index == 13:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 14:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 15:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 16:
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-        if index == 17:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 18:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 19:
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 20:
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-
-    return image
-
-
 def draw_bounding_rect(use_brect, image, brect):
     if use_brect:
         cv.rectangle(image, (brect[0], brect[1]), (brect[2], brect[3]),
@@ -388,11 +253,18 @@ def draw_info_text(image, brect, handedness, hand_sign_text):
     return image
 
 
-def draw_info(image, fps, mode, number):
+def draw_info(image, fps, mode, number, status='', stats=()):
     cv.putText(image, "FPS:" + str(fps), (10, 30), cv.FONT_HERSHEY_SIMPLEX,
                1.0, (0, 0, 0), 4, cv.LINE_AA)
     cv.putText(image, "FPS:" + str(fps), (10, 30), cv.FONT_HERSHEY_SIMPLEX,
                1.0, (255, 255, 255), 2, cv.LINE_AA)
+    if status:
+        cv.putText(image, status, (10, 60), cv.FONT_HERSHEY_SIMPLEX, 0.6,
+                   (255, 255, 255), 1, cv.LINE_AA)
+    for index, line in enumerate(reversed(stats)):
+        cv.putText(image, line, (10, image.shape[0] - 10 - index * 18),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1,
+                   cv.LINE_AA)
 
     mode_string = ['Logging Key Point', 'Logging Point History']
     if 1 <= mode <= 2:
@@ -1,17 +1,30 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import csv
-import copy
-import itertools
-import pickle
-
-import cv2 as cv
-import numpy as np
-import mediapipe as mp
-import RPi.GPIO as GPIO
-
-from utils import CvFpsCalc
-from utils.generate_commands import CommandGenerator
+import time
+
+# the startup timeline counts from here, before the heavy imports
+BOOT_TIME = time.perf_counter()
+
+import argparse  # noqa: E402
+import csv  # noqa: E402
+
+import cv2 as cv  # noqa: E402
+import RPi.GPIO as GPIO  # noqa: E402
+
+from utils import CvFpsCalc  # noqa: E402
+from utils.camera import CameraStream  # noqa: E402
+from utils.preprocess import FramePreprocessor  # noqa: E402
+from utils.landmarks import hands_to_array, pre_process_landmark  # noqa: E402
+from utils.classifier import KeypointClassifier  # noqa: E402
+from utils.generate_commands import (create_multi_hand_decoder,  # noqa: E402
+                                     DECODERS)
+from utils.startup import (StartupTimeline,  # noqa: E402
+                           run_parallel, create_hands)
+from utils.scheduler import InferenceScheduler  # noqa: E402
+from utils.roi import RoiTracker  # noqa: E402
+from utils.shutdown import StopSignal  # noqa: E402
+from utils.instrumentation import Instrumentation  # noqa: E402
+from utils.pipeline import run_pipeline  # noqa: E402
 
 GPIO.setmode(GPIO.BCM)
 
@@ -29,6 +42,8 @@ GPIO.output(19, 1)
 
 
 def main():
+    args = get_args()
+
     cap_device = 0
     cap_width = 960
     cap_height = 540
@@ -39,24 +54,52 @@ def main():
 
     use_brect = True
 
-    ################################################################
-    cap = cv.VideoCapture(cap_device)
-    cap.set(cv.CAP_PROP_FRAME_WIDTH, cap_width)
-    cap.set(cv.CAP_PROP_FRAME_HEIGHT, cap_height)
+    if args.pipeline:
+        run_pipeline(
+            gpio_actuator,
+            cap_device=cap_device,
+            cap_width=cap_width,
+            cap_height=cap_height,
+            mirror_input=False,
+            hands_kwargs=dict(
+                static_image_mode=use_static_image_mode,
+                max_num_hands=args.max_hands,
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence,
+            ),
+            model_path=args.model,
+            use_roi=args.roi,
+            control_socket=args.control_socket,
+            decoder=args.decoder,
+            watch_model=args.watch_model,
+            commander_kwargs=dict(command_interval=1),
+        )
+        return
+
+    timeline = StartupTimeline(BOOT_TIME)
 
-    ##############################################################
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        static_image_mode=use_static_image_mode,
-        max_num_hands=1,
-        min_detection_confidence=min_detection_confidence,
-        min_tracking_confidence=min_tracking_confidence,
-    )
-
-    filename = 'models/logreg_complete.pkl'
-    model = pickle.load(open(filename, 'rb'))
-
-    commander = CommandGenerator(command_interval=1)
+    ################################################################
+    cap, hands, classifier = run_parallel(timeline, [
+        ('camera', lambda: CameraStream(
+            cap_device, cap_width, cap_height).start()),
+        ('hands', lambda: create_hands(
+            static_image_mode=use_static_image_mode,
+            max_num_hands=args.max_hands,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            warmup_shape=(cap_height, cap_width, 3),
+        )),
+        ('classifier', lambda: KeypointClassifier(args.model)),
+    ])
+
+    process = hands.process
+    if args.roi:
+        process = RoiTracker(process).process
+    # skip most frames while nobody is in view
+    scheduler = InferenceScheduler(process)
+
+    commander = create_multi_hand_decoder(
+        args.decoder, classifier.classes, command_interval=1)
 
     #################################################################
 
@@ -73,85 +116,169 @@ def main():
     cvFpsCalc = CvFpsCalc(buffer_len=10)
 
     #########################################################################
+    preprocessor = FramePreprocessor(mirror_input=False)
+
     mode = 0
 
-    while True:
-        GPIO.output(17, 1)
-        GPIO.output(27, 1)
-        GPIO.output(22, 1)
-        GPIO.output(13, 1)
-        GPIO.output(19, 1)
+    instrumentation = Instrumentation()
+    frame_timer = instrumentation.timer()
+    instrumentation.add_gauge('preprocess alloc',
+                              preprocessor.allocation_text)
+    instrumentation.add_gauge('scheduler', scheduler.metrics_text)
+
+    stop = StopSignal(args.control_socket)
+    number = -1
+
+    while not stop.is_set():
+        release_pins()
         fps = cvFpsCalc.get()
+        frame_timer.start()
 
         ##################################################
-        key = cv.waitKey(10)
-        if key == 27:  # ESC
-            break
-        number, mode = select_mode(key, mode)
+        if not args.headless:
+            key = cv.waitKey(10)
+            if key == 27:  # ESC
+                break
+            number, mode = select_mode(key, mode)
+            frame_timer.lap('waitkey')
 
         ######################################################
-        ret, image = cap.read()
+        # bounded, so a camera that stalls without failing cannot keep
+        # the loop from noticing a stop request
+        ret, image = cap.read(timeout=0.5)
         if not ret:
+            if cap.running:
+                continue
             break
-        debug_image = cv.flip(image, 1)
-        # debug_image = copy.deepcopy(image)
+        frame_timer.lap('capture')
 
         ##############################################################
-        image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+        debug_image, image = preprocessor.process(image)
+        image_height, image_width = debug_image.shape[:2]
+        frame_timer.lap('preprocess')
 
         image.flags.writeable = False
-        results = hands.process(image)
+        results = scheduler.process(image)
         image.flags.writeable = True
+        frame_timer.lap('hands')
+
+        if timeline.mark_once('first_frame'):
+            print(timeline.report())
+        if args.watch_model and classifier.reload_if_changed():
+            print('reloaded ' + args.model)
 
         #####################################################################
-        if results.multi_hand_landmarks is not None:
-            for hand_landmarks, handedness in zip(results.multi_hand_landmarks,
-                                                  results.multi_handedness):
-
-                brect = calc_bounding_rect(debug_image, hand_landmarks)
-
-                landmark_list = calc_landmark_list(debug_image, hand_landmarks)
-
-                pre_processed_landmark_list = pre_process_landmark(
-                    landmark_list)
-
-
-                hand_sign_id = model.predict(pre_processed_landmark_list.reshape(1,-1))[0]
-                commander.add_gestures(hand_sign_id)
-                command = commander.get_command()
-                if command == 2:
-                    print('pointer - play/pause')
-                    GPIO.output(17, 0)
-                elif command == 3:
-                    print('thumb up - volume up')
-                    GPIO.output(22, 0)
-                elif command == 4:
-                    print('thumb down - volume down')
-                    GPIO.output(27, 0)
-                elif command == 5:
-                    print('horns up - skip song')
-                    GPIO.output(13, 0)
-                elif command == 6:
-                    print('horns down - back song')
-                    GPIO.output(19, 0)
+        if results is not None:
+            points = hands_to_array(results.multi_hand_landmarks)
+            features = pre_process_landmark(points, image_width, image_height)
+            # all hands go through the classifier in one call, the command
+            # state is kept per tracked hand
+            hand_sign_ids = commander.classify(classifier, features, points)
+            frame_timer.lap('classify')
+            for command in commander.get_commands():
+                if timeline.mark_once('first_command'):
+                    print(timeline.report())
+                send_command(command)
+                frame_timer.lap('actuate')
+                instrumentation.record(
+                    'frame_to_command', time.perf_counter() - cap.timestamp)
                 # print(command)
 
-                # debug_image = draw_bounding_rect(use_brect, debug_image, brect)
-                # debug_image = draw_landmarks(debug_image, landmark_list)
-                # debug_image = draw_info_text(
-                #    debug_image,
-                #    brect,
-                #    handedness,
-                #    keypoint_classifier_labels[hand_sign_id]
-                #)
-
-        # debug_image = draw_info(debug_image, fps, mode, number)
+            # from utils.landmarks import (calc_bounding_rect,
+            #                              calc_landmark_list)
+            # from utils.render import draw_landmarks
+            # brects = calc_bounding_rect(points, image_width, image_height)
+            # debug_image = draw_landmarks(debug_image, calc_landmark_list(
+            #     points, image_width, image_height))
+            # for index, handedness in enumerate(results.multi_handedness):
+            #     debug_image = draw_bounding_rect(
+            #         use_brect, debug_image, brects[index])
+            #     debug_image = draw_info_text(
+            #        debug_image,
+            #        brects[index],
+            #        handedness,
+            #        keypoint_classifier_labels[hand_sign_ids[index]]
+            #    )
+
+        # debug_image = draw_info(debug_image, fps, mode, number,
+        #                         scheduler.status_text())
 
         ##############################################################
         # cv.imshow('Hand Gesture Recognition', debug_image)
 
+        if args.stats_interval > 0:
+            instrumentation.dump_if_due(args.stats_interval)
+
     cap.release()
-    cv.destroyAllWindows()
+    stop.close()
+    if not args.headless:
+        cv.destroyAllWindows()
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pipeline', action='store_true',
+                        help='run capture, inference and GPIO output in '
+                             'separate processes (no preview)')
+    parser.add_argument('--roi', action='store_true',
+                        help='run MediaPipe on a window around the last '
+                             'detected hand')
+    parser.add_argument('--headless', action='store_true',
+                        help='no preview window and no cv.waitKey in the loop')
+    parser.add_argument('--control-socket', default=None,
+                        help='unix socket path that accepts a "stop" command')
+    parser.add_argument('--model', default='models/logreg_complete.npz',
+                        help='.npz classifier written by train.py')
+    parser.add_argument('--watch-model', action='store_true',
+                        help='reload the model when it changes on disk, '
+                             'e.g. after train_online.py')
+    parser.add_argument('--max-hands', type=int, default=1,
+                        help='hands tracked per frame, each with its own '
+                             'command state')
+    parser.add_argument('--decoder', choices=DECODERS, default='vote',
+                        help='vote: majority of the last hard labels, '
+                             'posterior: smoothed class probabilities')
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help='seconds between stage latency dumps when there '
+                             'is no preview (0 disables)')
+    return parser.parse_args()
+
+
+def release_pins():
+    GPIO.output(17, 1)
+    GPIO.output(27, 1)
+    GPIO.output(22, 1)
+    GPIO.output(13, 1)
+    GPIO.output(19, 1)
+
+
+def send_command(command):
+    if command == 2:
+        print('pointer - play/pause')
+        GPIO.output(17, 0)
+    elif command == 3:
+        print('thumb up - volume up')
+        GPIO.output(22, 0)
+    elif command == 4:
+        print('thumb down - volume down')
+        GPIO.output(27, 0)
+    elif command == 5:
+        print('horns up - skip song')
+        GPIO.output(13, 0)
+    elif command == 6:
+        print('horns down - back song')
+        GPIO.output(19, 0)
+
+
+def pulse_command(command):
+    # hold the pin low long enough for the receiver to see the edge
+    send_command(command)
+    time.sleep(0.01)
+    release_pins()
+
+
+def gpio_actuator():
+    return pulse_command
 
 
 def select_mode(key, mode):
@@ -167,256 +294,6 @@ def select_mode(key, mode):
     return number, mode
 
 
-def calc_bounding_rect(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_array = np.empty((0, 2), int)
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-
-        landmark_point = [np.array((landmark_x, landmark_y))]
-
-        landmark_array = np.append(landmark_array, landmark_point, axis=0)
-
-    x, y, w, h = cv.boundingRect(landmark_array)
-
-    return [x, y, x + w, y + h]
-
-
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_point = []
-
-    # キーポイント
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-        # landmark_z = landmark.z
-
-        landmark_point.append([landmark_x, landmark_y])
-
-    return landmark_point
-
-
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
-
-    # 相対座標に変換
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
-
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
-
-    # 1次元リストに変換
-    temp_landmark_list = list(
-        itertools.chain.from_iterable(temp_landmark_list))
-
-    # 正規化
-    max_value = max(list(map(abs, temp_landmark_list)))
-
-    def normalize_(n):
-        return n / max_value
-
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
-
-    return np.array(temp_landmark_list)
-
-
-def draw_landmarks(image, landmark_point):
-    # 接続線
-    if len(landmark_point) > 0:
-        # 親指
-        cv.line(image, tuple(landmark_point[2]), tuple(landmark_point[3]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[2]), tuple(landmark_point[3]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[3]), tuple(landmark_point[4]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[3]), tuple(landmark_point[4]),
-                (255, 255, 255), 2)
-
-        # 人差指
-        cv.line(image, tuple(landmark_point[5]), tuple(landmark_point[6]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[5]), tuple(landmark_point[6]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[6]), tuple(landmark_point[7]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[6]), tuple(landmark_point[7]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[7]), tuple(landmark_point[8]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[7]), tuple(landmark_point[8]),
-                (255, 255, 255), 2)
-
-        # 中指
-        cv.line(image, tuple(landmark_point[9]), tuple(landmark_point[10]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[9]), tuple(landmark_point[10]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[10]), tuple(landmark_point[11]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[10]), tuple(landmark_point[11]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[11]), tuple(landmark_point[12]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[11]), tuple(landmark_point[12]),
-                (255, 255, 255), 2)
-
-        # 薬指
-        cv.line(image, tuple(landmark_point[13]), tuple(landmark_point[14]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[13]), tuple(landmark_point[14]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[14]), tuple(landmark_point[15]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[14]), tuple(landmark_point[15]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[15]), tuple(landmark_point[16]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[15]), tuple(landmark_point[16]),
-                (255, 255, 255), 2)
-
-        # 小指
-        cv.line(image, tuple(landmark_point[17]), tuple(landmark_point[18]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[17]), tuple(landmark_point[18]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[18]), tuple(landmark_point[19]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[18]), tuple(landmark_point[19]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[19]), tuple(landmark_point[20]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[19]), tuple(landmark_point[20]),
-                (255, 255, 255), 2)
-
-        # 手の平
-        cv.line(image, tuple(landmark_point[0]), tuple(landmark_point[1]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[0]), tuple(landmark_point[1]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[1]), tuple(landmark_point[2]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[1]), tuple(landmark_point[2]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[2]), tuple(landmark_point[5]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[2]), tuple(landmark_point[5]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[5]), tuple(landmark_point[9]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[5]), tuple(landmark_point[9]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[9]), tuple(landmark_point[13]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[9]), tuple(landmark_point[13]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[13]), tuple(landmark_point[17]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[13]), tuple(landmark_point[17]),
-                (255, 255, 255), 2)
-        cv.line(image, tuple(landmark_point[17]), tuple(landmark_point[0]),
-                (0, 0, 0), 6)
-        cv.line(image, tuple(landmark_point[17]), tuple(landmark_point[0]),
-                (255, 255, 255), 2)
-
-    # キーポイント
-    for index, landmark in enumerate(landmark_point):
-        if index == 0:  # 手首1
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 1:  # 手首2
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 2:  # 親指：付け根
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 3:  # 親指：第1関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 4:  # 親指：指先
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-        if index == 5:  # 人差指：付け根
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 6:  # 人差指：第2関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 7:  # 人差指：第1関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 8:  # 人差指：指先
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-        if index == 9:  # 中指：付け根
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 10:  # 中指：第2関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 11:  # 中指：第1関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 12:  # 中指：指先
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-        if index == 13:  # 薬指：付け根
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 14:  # 薬指：第2関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 15:  # 薬指：第1関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 16:  # 薬指：指先
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-        if index == 17:  # 小指：付け根
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 18:  # 小指：第2関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 19:  # 小指：第1関節
-            cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-        if index == 20:  # 小指：指先
-            cv.circle(image, (landmark[0], landmark[1]), 8, (255, 255, 255),
-                      -1)
-            cv.circle(image, (landmark[0], landmark[1]), 8, (0, 0, 0), 1)
-
-    return image
-
-
 def draw_bounding_rect(use_brect, image, brect):
     if use_brect:
         # 外接矩形
@@ -439,11 +316,18 @@ def draw_info_text(image, brect, handedness, hand_sign_text):
     return image
 
 
-def draw_info(image, fps, mode, number):
+def draw_info(image, fps, mode, number, status='', stats=()):
     cv.putText(image, "FPS:" + str(fps), (10, 30), cv.FONT_HERSHEY_SIMPLEX,
                1.0, (0, 0, 0), 4, cv.LINE_AA)
     cv.putText(image, "FPS:" + str(fps), (10, 30), cv.FONT_HERSHEY_SIMPLEX,
                1.0, (255, 255, 255), 2, cv.LINE_AA)
+    if status:
+        cv.putText(image, status, (10, 60), cv.FONT_HERSHEY_SIMPLEX, 0.6,
+                   (255, 255, 255), 1, cv.LINE_AA)
+    for index, line in enumerate(reversed(stats)):
+        cv.putText(image, line, (10, image.shape[0] - 10 - index * 18),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1,
+                   cv.LINE_AA)
 
     mode_string = ['Logging Key Point', 'Logging Point History']
     if 1 <= mode <= 2:
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+
+from utils.replay import ReplaySource
+from utils.preprocess import FramePreprocessor
+from utils.landmarks import hands_to_array, pre_process_landmark
+from utils.classifier import KeypointClassifier
+from utils.generate_commands import create_multi_hand_decoder, DECODERS
+from utils.startup import create_hands
+from utils.scheduler import InferenceScheduler
+from utils.roi import RoiTracker
+from utils.instrumentation import Instrumentation
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Run recorded video or an image directory through the '
+                    'detection path and print per-frame gestures/commands')
+    parser.add_argument('input', help='video file or directory of images')
+    parser.add_argument('--output', default=None,
+                        help='per-frame CSV (default: stdout)')
+    parser.add_argument('--realtime', action='store_true',
+                        help='pace frames at their recorded timestamps')
+    parser.add_argument('--fps', type=float, default=30.0,
+                        help='frame rate for image directories')
+    parser.add_argument('--model', default='models/logreg_complete.npz',
+                        help='.npz classifier written by train.py')
+    parser.add_argument('--no-mirror', action='store_true',
+                        help='feed frames to MediaPipe unmirrored, like the '
+                             'GPIO scripts')
+    parser.add_argument('--every-frame', action='store_true',
+                        help='run inference on every frame instead of '
+                             'through the idle/tracking scheduler')
+    parser.add_argument('--roi', action='store_true')
+    parser.add_argument('--max-hands', type=int, default=1)
+    parser.add_argument('--decoder', choices=DECODERS, default='vote')
+    parser.add_argument('--min-detection-confidence', type=float, default=0.5)
+    parser.add_argument('--min-tracking-confidence', type=float, default=0.5)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    source = ReplaySource(args.input, realtime=args.realtime, fps=args.fps)
+    preprocessor = FramePreprocessor(mirror_input=not args.no_mirror)
+    hands = create_hands(
+        static_image_mode=False,
+        max_num_hands=args.max_hands,
+        min_detection_confidence=args.min_detection_confidence,
+        min_tracking_confidence=args.min_tracking_confidence,
+        warmup_shape=None,
+    )
+    classifier = KeypointClassifier(args.model)
+    # commands are timed on the recording, not the wall clock, so the
+    # output does not depend on how fast this machine is
+    commander = create_multi_hand_decoder(args.decoder, classifier.classes,
+                                          clock=source.clock)
+
+    process = hands.process
+    if args.roi:
+        process = RoiTracker(process).process
+    scheduler = None
+    if not args.every_frame:
+        scheduler = InferenceScheduler(process, clock=source.clock)
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    writer = csv.writer(output)
+    writer.writerow(['frame', 'timestamp_ms', 'hands', 'gestures', 'command'])
+
+    latencies = []
+    commands = 0
+    # how long the commanded gesture had been held when the command fired
+    runs = {}
+    hold_times = []
+    instrumentation = Instrumentation()
+    frame_timer = instrumentation.timer()
+    started = time.perf_counter()
+
+    while True:
+        ret, image = source.read()
+        if not ret:
+            break
+        frame_start = time.perf_counter()
+        frame_timer.start()
+
+        debug_image, image = preprocessor.process(image)
+        image_height, image_width = debug_image.shape[:2]
+        frame_timer.lap('preprocess')
+
+        image.flags.writeable = False
+        if scheduler is not None:
+            results = scheduler.process(image)
+        else:
+            results = process(image)
+        image.flags.writeable = True
+        frame_timer.lap('hands')
+
+        gestures = []
+        frame_commands = []
+        if results is not None:
+            points = hands_to_array(results.multi_hand_landmarks)
+            features = pre_process_landmark(points, image_width, image_height)
+            gestures = commander.classify(classifier, features, points)
+            for hand_id, gesture in zip(commander.hand_ids, gestures):
+                if runs.get(hand_id, (None,))[0] != gesture:
+                    runs[hand_id] = (gesture, source.timestamp)
+            for hand_id in commander.tracker.expired:
+                runs.pop(hand_id, None)
+            frame_commands = commander.get_commands()
+            for frame_command in frame_commands:
+                held_since = [runs[hand_id][1] for
+                              hand_id in commander.hand_ids
+                              if runs[hand_id][0] == frame_command]
+                if held_since:
+                    hold_times.append(source.timestamp - min(held_since))
+            commands += len(frame_commands)
+            frame_timer.lap('classify')
+
+        latencies.append(time.perf_counter() - frame_start)
+        writer.writerow([
+            source.sequence,
+            '{:.1f}'.format(source.timestamp * 1000.0),
+            len(gestures),
+            ';'.join(str(gesture) for gesture in gestures),
+            ';'.join(str(command) for command in frame_commands) or -1,
+        ])
+
+    elapsed = time.perf_counter() - started
+    source.release()
+    hands.close()
+    if output is not sys.stdout:
+        output.close()
+
+    if latencies:
+        latencies_ms = np.array(latencies) * 1000.0
+        print('frames: {}  commands: {}  wall: {:.2f} s  throughput: {:.1f} '
+              'fps'.format(len(latencies), commands, elapsed,
+                           len(latencies) / elapsed), file=sys.stderr)
+        print('frame latency ms  mean: {:.2f}  p50: {:.2f}  p95: {:.2f}  '
+              'max: {:.2f}'.format(latencies_ms.mean(),
+                                   np.percentile(latencies_ms, 50),
+                                   np.percentile(latencies_ms, 95),
+                                   latencies_ms.max()), file=sys.stderr)
+        if hold_times:
+            print('gesture held before command ms  mean: {:.1f}  max: {:.1f}'
+                  .format(np.mean(hold_times) * 1000.0,
+                          np.max(hold_times) * 1000.0), file=sys.stderr)
+        print('\n'.join(instrumentation.format_lines()), file=sys.stderr)
+        print('preprocess alloc: ' + preprocessor.allocation_text(),
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from utils.classifier import KeypointClassifier, export_model
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_example():
+    data = np.loadtxt(os.path.join(ROOT, 'example_data', 'keypoint.csv'),
+                      delimiter=',')
+    return data[:, 0].astype(np.int32), data[:, 1:]
+
+
+# trained with the installed sklearn, not only the pickles in models/
+@pytest.mark.parametrize('model, binary', [
+    (LogisticRegression(max_iter=2000), False),
+    (LogisticRegression(max_iter=2000), True),
+    (LogisticRegression(solver='liblinear'), True),
+    (SGDClassifier(loss='log_loss', random_state=0), False),
+])
+def test_exported_proba_matches_sklearn(tmp_path, model, binary):
+    labels, features = load_example()
+    if binary:
+        labels = (labels > 0).astype(np.int32)
+    model.fit(features, labels)
+    path = str(tmp_path / 'model.npz')
+    export_model(model, path)
+
+    classifier = KeypointClassifier(path)
+    np.testing.assert_allclose(classifier.predict_proba(features),
+                               model.predict_proba(features), atol=1e-9)
+    np.testing.assert_array_equal(classifier.predict(features),
+                                  model.predict(features))
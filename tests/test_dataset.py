@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils.dataset import (DatasetWriter, load_dataset, read_records,
+                           record_dtype, is_record_file, convert, read_header)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_example(rows=500):
+    data = np.loadtxt(os.path.join(ROOT, 'example_data', 'keypoint.csv'),
+                      delimiter=',', dtype=np.float32, max_rows=rows)
+    return data[:, 0].astype(np.int32), data[:, 1:]
+
+
+def write_rows(path, labels, features, **kwargs):
+    with DatasetWriter(path, **kwargs) as writer:
+        for label, row in zip(labels, features):
+            writer.write(int(label), row)
+    return writer
+
+
+@pytest.mark.parametrize('name', ['keypoints.csv', 'keypoints.bin'])
+def test_round_trip(tmp_path, name):
+    labels, features = load_example()
+    path = str(tmp_path / name)
+    writer = write_rows(path, labels, features)
+    assert writer.rows_written == len(labels)
+    assert is_record_file(path) == name.endswith('.bin')
+
+    loaded_labels, loaded_features = load_dataset(path)
+    np.testing.assert_array_equal(loaded_labels, labels)
+    np.testing.assert_array_equal(loaded_features, features)
+
+
+@pytest.mark.parametrize('name', ['keypoints.csv', 'keypoints.bin'])
+def test_reopen_appends(tmp_path, name):
+    labels, features = load_example()
+    path = str(tmp_path / name)
+    write_rows(path, labels[:200], features[:200])
+    write_rows(path, labels[200:], features[200:])
+
+    loaded_labels, loaded_features = load_dataset(path)
+    np.testing.assert_array_equal(loaded_labels, labels)
+    np.testing.assert_array_equal(loaded_features, features)
+
+
+def test_torn_record_is_truncated(tmp_path):
+    labels, features = load_example()
+    path = str(tmp_path / 'keypoints.bin')
+    write_rows(path, labels[:10], features[:10])
+    size = os.path.getsize(path)
+    # part of a record, as left by a crash in the middle of a write
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * (record_dtype().itemsize // 2))
+
+    # readers skip it
+    loaded_labels, _ = read_records(path)
+    np.testing.assert_array_equal(loaded_labels, labels[:10])
+
+    # and the next writer cuts it off before appending
+    write_rows(path, labels[10:20], features[10:20])
+    assert os.path.getsize(path) == size + 10 * record_dtype().itemsize
+    loaded_labels, loaded_features = read_records(path)
+    np.testing.assert_array_equal(loaded_labels, labels[:20])
+    np.testing.assert_array_equal(loaded_features, features[:20])
+
+    np.testing.assert_array_equal(read_records(path, start=15)[0],
+                                  labels[15:20])
+
+
+def test_reopen_with_other_width_fails(tmp_path):
+    path = str(tmp_path / 'keypoints.bin')
+    write_rows(path, [0], np.zeros((1, 42), dtype=np.float32))
+    with pytest.raises(ValueError):
+        DatasetWriter(path, num_features=8)
+
+
+def test_write_after_close_fails(tmp_path):
+    writer = DatasetWriter(str(tmp_path / 'keypoints.bin'))
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.write(0, np.zeros(42))
+
+
+@pytest.mark.parametrize('name', ['keypoints.csv', 'keypoints.bin'])
+def test_convert_loads_memory_mapped(tmp_path, name):
+    labels, features = load_example()
+    source = str(tmp_path / name)
+    write_rows(source, labels, features)
+    destination = str(tmp_path / 'dataset')
+    # chunks smaller than the file, with a short last one
+    header = convert(source, destination, chunk_rows=64)
+    assert header['rows'] == len(labels)
+    assert header['num_features'] == features.shape[1]
+    assert read_header(destination) == header
+    assert not os.path.exists(destination + '.partial')
+
+    loaded_labels, loaded_features = load_dataset(destination)
+    assert isinstance(loaded_features, np.memmap)
+    assert isinstance(loaded_labels, np.memmap)
+    assert loaded_features.dtype == np.float32
+    assert loaded_labels.dtype == np.int32
+    np.testing.assert_array_equal(loaded_labels, labels)
+    np.testing.assert_array_equal(loaded_features, features)
+
+    loaded_labels, _ = load_dataset(destination, mmap=False)
+    assert not isinstance(loaded_labels, np.memmap)
+
+
+def test_convert_replaces_an_older_dataset(tmp_path):
+    labels, features = load_example()
+    source = str(tmp_path / 'keypoints.bin')
+    destination = str(tmp_path / 'dataset')
+    write_rows(source, labels[:100], features[:100])
+    convert(source, destination)
+    # a torn tail is not converted
+    write_rows(source, labels[100:], features[100:])
+    with open(source, 'ab') as f:
+        f.write(b'\x01' * 7)
+    convert(source, destination)
+
+    loaded_labels, loaded_features = load_dataset(destination)
+    np.testing.assert_array_equal(loaded_labels, labels)
+    np.testing.assert_array_equal(loaded_features, features)
+
+
+def test_convert_empty_record_file(tmp_path):
+    source = str(tmp_path / 'keypoints.bin')
+    DatasetWriter(source).close()
+    destination = str(tmp_path / 'dataset')
+    assert convert(source, destination)['rows'] == 0
+    labels, features = load_dataset(destination)
+    assert labels.shape == (0,)
+    assert features.shape == (0, 42)
+
+
+def test_load_dataset_checks_the_header(tmp_path):
+    labels, features = load_example(10)
+    source = str(tmp_path / 'keypoints.bin')
+    write_rows(source, labels, features)
+    destination = str(tmp_path / 'dataset')
+    convert(source, destination)
+    np.save(os.path.join(destination, 'labels.npy'), labels[:5])
+    with pytest.raises(ValueError):
+        load_dataset(destination)
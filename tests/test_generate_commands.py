@@ -0,0 +1,117 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from utils.generate_commands import CommandGenerator
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ReferenceGenerator(object):
+    # the original voter: deque.count per command, first command wins
+    def __init__(self, deque_size, command_interval, vote_threshold, clock,
+                 commands):
+        self.deque_size = deque_size
+        self.command_interval = command_interval
+        self.vote_count = vote_threshold * deque_size
+        self.clock = clock
+        self.commands = commands
+        self.gestures = deque()
+        self.last_command_time = float('-inf')
+
+    def add_gestures(self, gesture):
+        if self.clock() - self.last_command_time > self.command_interval:
+            self.gestures.append(gesture)
+            if len(self.gestures) > self.deque_size:
+                self.gestures.popleft()
+
+    def get_command(self):
+        if self.clock() - self.last_command_time <= self.command_interval:
+            return -1
+        commands = self.commands
+        if commands is None:
+            commands = sorted(set(self.gestures))
+        for command in commands:
+            if self.gestures.count(command) >= self.vote_count:
+                self.last_command_time = self.clock()
+                self.gestures.clear()
+                return command
+        return -1
+
+
+@pytest.mark.parametrize('deque_size', [5, 10, 30])
+@pytest.mark.parametrize('vote_threshold', [0.3, 0.5, 0.7])
+@pytest.mark.parametrize('commands', [(2, 3, 4, 5, 6), (6, 2), None])
+def test_matches_reference_voter(deque_size, vote_threshold, commands):
+    rng = np.random.default_rng(deque_size)
+    clock = FakeClock()
+    kwargs = dict(deque_size=deque_size, command_interval=1,
+                  vote_threshold=vote_threshold, clock=clock,
+                  commands=commands)
+    generator = CommandGenerator(**kwargs)
+    reference = ReferenceGenerator(**kwargs)
+
+    label = 0
+    fired = 0
+    for _ in range(3000):
+        # runs of one label, like a held gesture
+        if rng.random() < 0.2:
+            label = int(rng.integers(0, 7))
+        clock.now += rng.uniform(0.02, 0.2)
+        generator.add_gestures(label)
+        reference.add_gestures(label)
+        command = generator.get_command()
+        assert command == reference.get_command()
+        assert list(generator.gestures) == list(reference.gestures)
+        fired += command != -1
+    assert fired
+
+
+def test_instances_do_not_share_state():
+    clock = FakeClock()
+    first = CommandGenerator(clock=clock)
+    second = CommandGenerator(clock=clock)
+    for _ in range(10):
+        first.add_gestures(3)
+    assert list(second.gestures) == []
+    assert second.get_majority_vote() == -1
+
+    assert first.get_command() == 3
+    # the cooldown belongs to `first` only
+    for _ in range(10):
+        second.add_gestures(4)
+    assert second.get_command() == 4
+    assert list(first.gestures) == []
+
+
+@pytest.mark.parametrize('commands, expected', [
+    ((2, 3, 4, 5, 6), 2),
+    ((3, 2), 3),
+    (None, 2),
+])
+@pytest.mark.parametrize('vote_threshold', [0.3, 0.5])
+def test_ties_go_to_the_first_command(commands, expected, vote_threshold):
+    generator = CommandGenerator(vote_threshold=vote_threshold,
+                                 clock=FakeClock(), commands=commands)
+    for gesture in [3] * 5 + [2] * 5:
+        generator.add_gestures(gesture)
+    assert generator.get_majority_vote() == expected
+
+
+def test_any_label_votes_without_a_command_list():
+    generator = CommandGenerator(clock=FakeClock(), commands=None)
+    for _ in range(10):
+        generator.add_gestures(0)
+    assert generator.get_command() == 0
+
+    restricted = CommandGenerator(clock=FakeClock())
+    for _ in range(10):
+        restricted.add_gestures(0)
+    assert restricted.get_command() == -1
@@ -0,0 +1,78 @@
+import os
+
+import cv2 as cv
+import numpy as np
+
+from utils.render import JOINT_RADII, draw_landmarks
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_WIDTH = 960
+IMAGE_HEIGHT = 540
+
+# the bones in the order the per-segment drawing used
+BONES = [(2, 3), (3, 4), (5, 6), (6, 7), (7, 8), (9, 10), (10, 11),
+         (11, 12), (13, 14), (14, 15), (15, 16), (17, 18), (18, 19),
+         (19, 20), (0, 1), (1, 2), (2, 5), (5, 9), (9, 13), (13, 17),
+         (17, 0)]
+
+
+def draw_reference(image, hand):
+    # one cv.line per bone and one cv.circle pair per joint
+    for start, end in BONES:
+        cv.line(image, tuple(hand[start]), tuple(hand[end]), (0, 0, 0), 6)
+        cv.line(image, tuple(hand[start]), tuple(hand[end]),
+                (255, 255, 255), 2)
+    for index, point in enumerate(hand):
+        radius = int(JOINT_RADII[index])
+        cv.circle(image, tuple(point), radius, (255, 255, 255), -1)
+        cv.circle(image, tuple(point), radius, (0, 0, 0), 1)
+    return image
+
+
+def example_hands(count, seed=0):
+    data = np.loadtxt(os.path.join(ROOT, 'example_data', 'keypoint.csv'),
+                      delimiter=',', dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    points = data[rng.choice(len(data), count), 1:].reshape(-1, 21, 2)
+    scale = rng.uniform(0.1, 0.3, (count, 1, 1))
+    centre = rng.uniform(0.0, 1.0, (count, 1, 2))
+    return centre + points * scale / (1.0, IMAGE_HEIGHT / IMAGE_WIDTH)
+
+
+def differing_share(hands):
+    differing = drawn = 0
+    for hand in hands:
+        pixels = (hand * (IMAGE_WIDTH, IMAGE_HEIGHT)).astype(int)
+        # grey, so black outline pixels count as drawn too
+        expected = np.full((IMAGE_HEIGHT, IMAGE_WIDTH, 3), 128, np.uint8)
+        actual = expected.copy()
+        draw_reference(expected, [tuple(map(int, p)) for p in pixels])
+        draw_landmarks(actual, pixels)
+        differing += (expected != actual).any(axis=-1).sum()
+        drawn += ((expected != 128) | (actual != 128)).any(axis=-1).sum()
+    return differing / drawn
+
+
+# only bones of one chain that cross each other (a curled finger, the
+# palm outline of a fist) can differ: each chain draws all its outlines
+# before its fills. Measured 0.15% for recorded hands, 0.72% for random
+# landmarks.
+def test_recorded_hands_stay_close_to_per_segment_drawing():
+    # including hands cut off by the image border
+    assert differing_share(example_hands(150)) < 0.005
+
+
+def test_random_landmarks_stay_close_to_per_segment_drawing():
+    rng = np.random.default_rng(0)
+    assert differing_share(rng.uniform(0.0, 1.0, (150, 21, 2))) < 0.01
+
+
+def test_several_hands_match_drawing_them_one_by_one():
+    hands = (example_hands(4, seed=1) *
+             (IMAGE_WIDTH, IMAGE_HEIGHT)).astype(np.int32)
+    together = np.zeros((IMAGE_HEIGHT, IMAGE_WIDTH, 3), np.uint8)
+    one_by_one = together.copy()
+    draw_landmarks(together, hands)
+    for hand in hands:
+        draw_landmarks(one_by_one, hand)
+    np.testing.assert_array_equal(together, one_by_one)
@@ -0,0 +1,110 @@
+import numpy as np
+
+from utils.generate_commands import CommandGenerator, MultiHandDecoder
+from utils.tracking import HandTracker
+
+SHAPE = np.random.default_rng(0).uniform(-0.05, 0.05, (21, 2))
+NO_HANDS = np.zeros((0, 21, 2))
+
+
+def hands(*centres):
+    # (N, 21, 2) normalized landmarks with their palm centres at `centres`
+    return np.array([SHAPE - SHAPE.mean(axis=0) + centre for
+                     centre in centres]).reshape(-1, 21, 2)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ids_follow_moving_hands():
+    tracker = HandTracker()
+    first = tracker.update(hands((0.2, 0.5), (0.7, 0.5)))
+    assert first == [0, 1]
+    for step in range(1, 20):
+        # listed in the opposite order, as MediaPipe may do
+        ids = tracker.update(hands((0.7 - 0.01 * step, 0.5),
+                                   (0.2 + 0.01 * step, 0.5)))
+        assert ids == [1, 0]
+    assert tracker.expired == []
+
+
+def test_a_jump_past_max_distance_is_a_new_hand():
+    tracker = HandTracker(max_distance=0.2)
+    assert tracker.update(hands((0.2, 0.5))) == [0]
+    assert tracker.update(hands((0.5, 0.5))) == [1]
+
+
+def test_matching_is_greedy_closest_pair_first():
+    tracker = HandTracker(max_distance=0.2)
+    assert tracker.update(hands((0.30, 0.5), (0.50, 0.5))) == [0, 1]
+    # 0.45 is closest to track 1, which leaves 0.62 too far from track 0,
+    # even though pairing 0.45 with track 0 would have matched both
+    assert tracker.update(hands((0.45, 0.5), (0.62, 0.5))) == [1, 2]
+
+
+def test_frames_without_hands_expire_tracks():
+    tracker = HandTracker(max_missing=3)
+    assert tracker.update(hands((0.5, 0.5))) == [0]
+    for _ in range(3):
+        assert tracker.update(NO_HANDS) == []
+        assert tracker.expired == []
+    assert tracker.update(hands((0.5, 0.5))) == [0]
+
+    for _ in range(3):
+        tracker.update(NO_HANDS)
+    tracker.update(NO_HANDS)
+    assert tracker.expired == [0]
+    assert tracker.tracks == {}
+    assert tracker.update(hands((0.5, 0.5))) == [1]
+
+
+def test_reset_expires_every_track():
+    tracker = HandTracker()
+    tracker.update(hands((0.2, 0.5), (0.7, 0.5)))
+    tracker.reset()
+    assert sorted(tracker.expired) == [0, 1]
+    assert tracker.update(hands((0.2, 0.5))) == [2]
+
+
+def test_decoders_are_kept_per_hand():
+    clock = FakeClock()
+    decoder = MultiHandDecoder(
+        lambda: CommandGenerator(clock=clock, command_interval=1),
+        HandTracker(max_missing=2))
+    points = hands((0.2, 0.5), (0.7, 0.5))
+    # hand 0 holds 3 and hand 1 holds 0, which is not a command, while the
+    # order of the hands in the frame flips every frame
+    for frame in range(7):
+        if frame % 2:
+            decoder.add_gestures([0, 3], points[::-1])
+            assert decoder.hand_ids == [1, 0]
+        else:
+            decoder.add_gestures([3, 0], points)
+            assert decoder.hand_ids == [0, 1]
+        commands = decoder.get_commands()
+    assert commands == [3]
+    assert list(decoder.decoders[1].gestures) == [0] * 7
+    assert sorted(decoder.decoders) == [0, 1]
+
+
+def test_expired_hands_drop_their_decoder():
+    clock = FakeClock()
+    decoder = MultiHandDecoder(lambda: CommandGenerator(clock=clock),
+                               HandTracker(max_missing=2))
+    for _ in range(5):
+        decoder.add_gestures([2], hands((0.5, 0.5)))
+    for _ in range(3):
+        decoder.add_gestures([], NO_HANDS)
+        assert decoder.get_commands() == []
+    assert decoder.decoders == {}
+
+    # the same place, but a new hand whose votes start from zero
+    for _ in range(5):
+        decoder.add_gestures([2], hands((0.5, 0.5)))
+    assert decoder.hand_ids == [1]
+    assert decoder.get_commands() == []
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import os
+import pickle
+import platform
+import sys
+import time
+
+import numpy as np
+import sklearn
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.model_selection import (GridSearchCV, StratifiedGroupKFold,
+                                     StratifiedKFold, train_test_split)
+
+from utils.augment import KeypointAugmenter
+from utils.classifier import KeypointClassifier, export_model
+from utils.dataset import load_dataset
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Train the keypoint classifier with a cross-validated '
+                    'hyperparameter search')
+    parser.add_argument('dataset', nargs='?',
+                        default='example_data/keypoint.csv',
+                        help='CSV, binary record file or dataset directory')
+    parser.add_argument('--output', default='models/logreg_trained',
+                        help='writes <output>.pkl, <output>.npz and '
+                             '<output>_metrics.json')
+    parser.add_argument('--C', type=float, nargs='+',
+                        default=[0.01, 0.1, 1.0, 10.0, 100.0])
+    parser.add_argument('--class-weight', nargs='+',
+                        choices=['none', 'balanced'],
+                        default=['none', 'balanced'])
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--test-size', type=float, default=0.25,
+                        help='held out for the metrics report')
+    parser.add_argument('--augment', type=int, default=0,
+                        help='augmented copies of every training row, '
+                             'generated in memory')
+    parser.add_argument('--max-iter', type=int, default=1000)
+    parser.add_argument('--jobs', type=int, default=-1,
+                        help='parallel fits, -1 uses every core')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def search(features, labels, args, groups=None):
+    param_grid = {
+        'C': args.C,
+        'class_weight': [None if weight == 'none' else weight for
+                         weight in args.class_weight],
+    }
+    if groups is None:
+        folds = StratifiedKFold(n_splits=args.folds, shuffle=True,
+                                random_state=args.seed)
+    else:
+        # copies of one recorded row stay in the same fold
+        folds = StratifiedGroupKFold(n_splits=args.folds, shuffle=True,
+                                     random_state=args.seed)
+    grid = GridSearchCV(
+        LogisticRegression(solver='lbfgs', max_iter=args.max_iter),
+        param_grid, cv=folds, n_jobs=args.jobs, refit=True)
+    grid.fit(features, labels, groups=groups)
+    return grid
+
+
+def main():
+    args = get_args()
+
+    started = time.perf_counter()
+    labels, features = load_dataset(args.dataset)
+    x_train, x_test, y_train, y_test = train_test_split(
+        features, labels, test_size=args.test_size, stratify=labels,
+        random_state=args.seed)
+    print('{} rows ({} train / {} test), {} features'.format(
+        len(labels), len(y_train), len(y_test), features.shape[1]))
+
+    groups = None
+    if args.augment:
+        augmenter = KeypointAugmenter(seed=args.seed)
+        groups = np.tile(np.arange(len(y_train)), args.augment + 1)
+        y_train, x_train = augmenter.expand(y_train, x_train, args.augment)
+        print('{} training rows after augmentation'.format(len(y_train)))
+
+    # sklearn keeps float32 input in float32 (coef_ included); float64
+    # fits score the same as the exported weights
+    x_train = np.asarray(x_train, dtype=np.float64)
+    x_test = np.asarray(x_test, dtype=np.float64)
+
+    grid = search(x_train, y_train, args, groups)
+    model = grid.best_estimator_
+    search_seconds = time.perf_counter() - started
+
+    predictions = model.predict(x_test)
+    metrics = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dataset': args.dataset,
+        'rows': int(len(labels)),
+        'train_rows': int(len(y_train)),
+        'test_rows': int(len(y_test)),
+        'augment': args.augment,
+        'best_params': grid.best_params_,
+        'cv_accuracy': float(grid.best_score_),
+        'test_accuracy': float((predictions == y_test).mean()),
+        'classification_report': classification_report(
+            y_test, predictions, output_dict=True, zero_division=0),
+        'confusion_matrix': confusion_matrix(
+            y_test, predictions, labels=model.classes_).tolist(),
+        'classes': model.classes_.tolist(),
+        'search': [
+            {'params': params, 'mean_accuracy': float(mean),
+             'std_accuracy': float(std)}
+            for params, mean, std in zip(
+                grid.cv_results_['params'],
+                grid.cv_results_['mean_test_score'],
+                grid.cv_results_['std_test_score'])
+        ],
+        'seconds': search_seconds,
+        'python': platform.python_version(),
+        'sklearn': sklearn.__version__,
+    }
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output + '.pkl', 'wb') as f:
+        pickle.dump(model, f)
+    export_model(model, args.output + '.npz')
+    # the detectors only see the .npz, it has to score like the model
+    exported = KeypointClassifier(args.output + '.npz')
+    error = float(np.abs(exported.predict_proba(x_test) -
+                         model.predict_proba(x_test)).max())
+    if error > 1e-9:
+        sys.exit('{}.npz does not match the trained model: predict_proba '
+                 'differs by up to {:.3g}'.format(args.output, error))
+    metrics['export_max_proba_error'] = error
+    with open(args.output + '_metrics.json', 'w') as f:
+        json.dump(metrics, f, indent=2)
+
+    print('best {}  cv accuracy {:.4f}  test accuracy {:.4f}  ({:.1f} s)'
+          .format(grid.best_params_, metrics['cv_accuracy'],
+                  metrics['test_accuracy'], search_seconds))
+    print('wrote {0}.pkl, {0}.npz and {0}_metrics.json'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
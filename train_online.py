@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse
+
+from utils.augment import KeypointAugmenter
+from utils.online import OnlineTrainer
+from utils.shutdown import StopSignal
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Update an SGD keypoint classifier with the rows added '
+                    'to a dataset file since the last update')
+    parser.add_argument('source', nargs='?', default='data/keypoints.csv',
+                        help='CSV or binary record file from '
+                             'data_collection.py')
+    parser.add_argument('--checkpoint', default='models/online',
+                        help='writes <checkpoint>.pkl, <checkpoint>.npz and '
+                             '<checkpoint>_state.json')
+    parser.add_argument('--watch', type=float, default=0.0,
+                        help='keep polling the source every N seconds')
+    parser.add_argument('--epochs', type=int, default=5,
+                        help='passes over every batch of new rows')
+    parser.add_argument('--augment', type=int, default=0,
+                        help='augmented copies of every new row')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    augmenter = KeypointAugmenter(seed=args.seed) if args.augment else None
+    trainer = OnlineTrainer(args.checkpoint, augmenter=augmenter,
+                            copies=args.augment, epochs=args.epochs,
+                            seed=args.seed)
+
+    stop = StopSignal()
+    while True:
+        rows = trainer.update(args.source)
+        if rows:
+            print('update {}: {} new rows, {} seen, wrote {}'.format(
+                trainer.state['updates'], rows, trainer.state['rows_seen'],
+                trainer.npz_path))
+        if args.watch <= 0 or stop.wait(args.watch):
+            break
+    stop.close()
+
+
+if __name__ == '__main__':
+    main()
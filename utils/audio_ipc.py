@@ -0,0 +1,125 @@
+import collections
+import select
+import socket
+import struct
+import sys
+import time
+
+DEFAULT_SOCKET = '/tmp/gesture_audio.sock'
+
+# the gesture command numbers (see PlaylistPlayer.apply), plus a ping
+# that is only acknowledged
+COMMANDS = {
+    'ping': 0,
+    'play_pause': 2,
+    'volume_up': 3,
+    'volume_down': 4,
+    'next': 5,
+    'previous': 6,
+}
+PING = COMMANDS['ping']
+
+STATUS_UNKNOWN = 0
+STATUS_OK = 1
+
+# one datagram per command and per ack; the timestamps are
+# time.monotonic(), which is the same clock in every process on the host
+REQUEST = struct.Struct('<IBd')
+ACK = struct.Struct('<IBBddd')
+
+Ack = collections.namedtuple(
+    'Ack', ['seq', 'command', 'status', 'sent', 'received', 'applied'])
+
+
+class AudioClient(object):
+    def __init__(self, path=DEFAULT_SOCKET, instrumentation=None):
+        self.path = path
+        self.instrumentation = instrumentation
+        self.sent = 0
+        self.dropped = 0
+        self.acked = 0
+        self._seq = 0
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # an empty name autobinds to an abstract address, so the daemon has
+        # somewhere to send the acks without leaving files behind
+        self._sock.bind('')
+        self._sock.setblocking(False)
+
+    def __call__(self, command):
+        self.send(command)
+
+    def send(self, command):
+        # never blocks: with the daemon down or behind, the command is
+        # dropped instead of stalling the detection loop
+        self.poll_acks()
+        self._seq = (self._seq + 1) & 0xffffffff
+        try:
+            self._sock.sendto(
+                REQUEST.pack(self._seq, command, time.monotonic()),
+                self.path)
+        except (BlockingIOError, FileNotFoundError, ConnectionRefusedError):
+            self.dropped += 1
+            return None
+        self.sent += 1
+        return self._seq
+
+    def poll_acks(self):
+        acks = []
+        while True:
+            try:
+                data = self._sock.recv(ACK.size)
+            except BlockingIOError:
+                break
+            if len(data) != ACK.size:
+                continue
+            received_at = time.monotonic()
+            ack = Ack(*ACK.unpack(data))
+            acks.append(ack)
+            self.acked += 1
+            if self.instrumentation is not None:
+                self.instrumentation.record('command_to_audio',
+                                            ack.applied - ack.sent)
+                self.instrumentation.record('command_round_trip',
+                                            received_at - ack.sent)
+        return acks
+
+    def wait_ack(self, seq, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            for ack in self.poll_acks():
+                if ack.seq == seq:
+                    return ack
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            select.select([self._sock], [], [], remaining)
+
+    def close(self):
+        self._sock.close()
+
+
+def send_command(command, path=DEFAULT_SOCKET, timeout=2.0):
+    if not isinstance(command, int):
+        command = COMMANDS[command] if command in COMMANDS else int(command)
+    client = AudioClient(path)
+    try:
+        seq = client.send(command)
+        if seq is None:
+            return None
+        return client.wait_ack(seq, timeout)
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    ack = send_command(*sys.argv[1:3])
+    if ack is None:
+        print('no reply')
+    else:
+        print('{} status={} queued={:.2f}ms applied={:.2f}ms '
+              'total={:.2f}ms'.format(
+                  ack.command, ack.status,
+                  (ack.received - ack.sent) * 1000.0,
+                  (ack.applied - ack.received) * 1000.0,
+                  (ack.applied - ack.sent) * 1000.0))
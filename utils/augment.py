@@ -0,0 +1,81 @@
+import numpy as np
+
+from utils.landmarks import NUM_LANDMARKS
+
+
+class KeypointAugmenter(object):
+    def __init__(self, rotation=15.0, scale=(0.85, 1.15), jitter=0.02,
+                 mirror=0.5, seed=None):
+        # max rotation in degrees, either direction
+        self.rotation = rotation
+        # per-axis stretch; an even scale is undone by the max-abs
+        # normalization, so only the aspect change survives
+        self.scale = scale
+        # std of the per-joint noise, in normalized units
+        self.jitter = jitter
+        # probability of flipping left/right, i.e. the other hand
+        self.mirror = mirror
+        self.rng = np.random.default_rng(seed)
+
+    def augment(self, features, out=None):
+        features = np.asarray(features, dtype=np.float32)
+        count = len(features)
+        points = features.reshape(count, NUM_LANDMARKS, 2)
+        rng = self.rng
+
+        angle = np.radians(rng.uniform(-self.rotation, self.rotation, count))
+        cos, sin = np.cos(angle), np.sin(angle)
+        stretch = rng.uniform(self.scale[0], self.scale[1], (count, 2))
+        flip = np.where(rng.random(count) < self.mirror, -1.0, 1.0)
+
+        # rotation, stretch and mirror folded into one 2x2 per sample
+        transform = np.empty((count, 2, 2), dtype=np.float32)
+        transform[:, 0, 0] = cos * stretch[:, 0] * flip
+        transform[:, 0, 1] = -sin * stretch[:, 0] * flip
+        transform[:, 1, 0] = sin * stretch[:, 1]
+        transform[:, 1, 1] = cos * stretch[:, 1]
+
+        if out is None:
+            out = np.empty((count, NUM_LANDMARKS * 2), dtype=np.float32)
+        moved = out.reshape(count, NUM_LANDMARKS, 2)
+        np.matmul(points, transform.transpose(0, 2, 1), out=moved)
+
+        if self.jitter:
+            noise = rng.standard_normal(moved.shape, dtype=np.float32)
+            noise *= self.jitter
+            # the wrist is the origin of the features, keep it there
+            noise[:, 0] = 0.0
+            moved += noise
+
+        # same normalization as pre_process_landmark
+        max_value = np.abs(out).max(axis=1, keepdims=True)
+        np.divide(out, max_value, out=out, where=max_value > 0)
+        return out
+
+    def batches(self, labels, features, batch_size=4096, epochs=1,
+                shuffle=True):
+        # augmented copies generated in memory, one batch at a time
+        labels = np.asarray(labels)
+        out = np.empty((batch_size, NUM_LANDMARKS * 2), dtype=np.float32)
+        for _ in range(epochs):
+            order = (self.rng.permutation(len(labels)) if shuffle else
+                     np.arange(len(labels)))
+            for start in range(0, len(order), batch_size):
+                index = order[start:start + batch_size]
+                batch = self.augment(features[index], out=out[:len(index)])
+                yield labels[index], batch
+
+    def expand(self, labels, features, copies, batch_size=4096):
+        # originals followed by `copies` augmented versions of every row
+        rows = len(labels)
+        out_labels = np.tile(np.asarray(labels), copies + 1)
+        out_features = np.empty(((copies + 1) * rows, features.shape[1]),
+                                dtype=np.float32)
+        out_features[:rows] = features
+        for copy in range(1, copies + 1):
+            for start in range(0, rows, batch_size):
+                stop = min(start + batch_size, rows)
+                offset = copy * rows
+                self.augment(features[start:stop],
+                             out=out_features[offset + start:offset + stop])
+        return out_labels, out_features
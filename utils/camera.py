@@ -0,0 +1,98 @@
+import threading
+import time
+
+import cv2 as cv
+
+
+class CameraStream(object):
+    def __init__(self, device=0, width=None, height=None):
+        self._cap = cv.VideoCapture(device)
+        if width is not None:
+            self._cap.set(cv.CAP_PROP_FRAME_WIDTH, width)
+        if height is not None:
+            self._cap.set(cv.CAP_PROP_FRAME_HEIGHT, height)
+        # keep the driver queue as short as possible, the thread drains it
+        self._cap.set(cv.CAP_PROP_BUFFERSIZE, 1)
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        self._frame = None
+        self._frame_time = 0.0
+        self._frame_seq = 0
+        self._read_seq = 0
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_read = 0
+        # perf_counter() time at which the last read frame was captured
+        self.timestamp = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._update, daemon=True)
+            self._thread.start()
+        return self
+
+    def _update(self):
+        while self._running:
+            ret, frame = self._cap.read()
+            captured_at = time.perf_counter()
+            with self._cond:
+                if not ret:
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                # the previous frame was never handed out
+                if self._frame_seq > self._read_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._frame_time = captured_at
+                self._frame_seq += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=None):
+        ret, frame, _ = self.read_latest(timeout)
+        return ret, frame
+
+    def read_latest(self, timeout=None):
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._frame_seq > self._read_seq or not self._running,
+                timeout)
+            if not ready or self._frame_seq == self._read_seq:
+                return False, None, self._read_seq
+            self._read_seq = self._frame_seq
+            self.timestamp = self._frame_time
+            self.frames_read += 1
+            return True, self._frame, self._read_seq
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def sequence(self):
+        return self._read_seq
+
+    def set(self, prop_id, value):
+        return self._cap.set(prop_id, value)
+
+    def get(self, prop_id):
+        return self._cap.get(prop_id)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def release(self):
+        with self._cond:
+            self._running = False
+            # wakes up a read() still waiting for a frame
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._cap.release()
@@ -0,0 +1,119 @@
+import argparse
+import os
+import pickle
+import time
+import zipfile
+
+import numpy as np
+
+
+def _multi_class(model):
+    # sklearn >= 1.8 no longer has multi_class on LogisticRegression, and
+    # SGDClassifier never had it (its probabilities are always one-vs-rest)
+    multi_class = getattr(model, 'multi_class', None)
+    if multi_class in (None, 'auto', 'deprecated'):
+        solver = getattr(model, 'solver', None)
+        # same rule sklearn applies when multi_class is left on 'auto'
+        if (solver is not None and solver != 'liblinear' and
+                len(model.classes_) > 2):
+            return 'multinomial'
+        return 'ovr'
+    return multi_class
+
+
+def export_model(model, path):
+    np.savez(
+        path,
+        coef=np.asarray(model.coef_, dtype=np.float64),
+        intercept=np.asarray(model.intercept_, dtype=np.float64),
+        classes=np.asarray(model.classes_),
+        multi_class=np.array(_multi_class(model)),
+    )
+
+
+class KeypointClassifier(object):
+    def __init__(self, model_path='models/logreg_complete.npz'):
+        self.model_path = model_path
+        self._checked_at = time.monotonic()
+        self.load()
+
+    def load(self):
+        stat = self._model_stat()
+        with np.load(self.model_path) as data:
+            coef = data['coef']
+            intercept = data['intercept']
+            classes = data['classes']
+            multi_class = str(data['multi_class'])
+        # swapped in only once the whole file has been read
+        self.coef, self.intercept = coef, intercept
+        self.classes, self.multi_class = classes, multi_class
+        self._coef_t = np.ascontiguousarray(coef.T)
+        self._stat = stat
+
+    def _model_stat(self):
+        stat = os.stat(self.model_path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def reload_if_changed(self, check_interval=2.0):
+        # picks up a model replaced on disk, e.g. by train_online.py; the
+        # file is only stat'ed every check_interval seconds
+        now = time.monotonic()
+        if now - self._checked_at < check_interval:
+            return False
+        self._checked_at = now
+        try:
+            if self._model_stat() == self._stat:
+                return False
+            self.load()
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # mid-replace or unreadable, keep the current weights
+            return False
+        return True
+
+    def decision_function(self, features):
+        scores = np.dot(features, self._coef_t) + self.intercept
+        if scores.shape[-1] == 1:
+            return scores[..., 0]
+        return scores
+
+    def predict(self, features):
+        scores = self.decision_function(features)
+        if scores.ndim == np.ndim(features) - 1:
+            indices = (scores > 0).astype(np.intp)
+        else:
+            indices = scores.argmax(axis=-1)
+        return self.classes[indices]
+
+    def predict_proba(self, features):
+        scores = self.decision_function(features)
+        if scores.ndim == np.ndim(features) - 1:
+            positive = 1.0 / (1.0 + np.exp(-scores))
+            return np.stack((1.0 - positive, positive), axis=-1)
+
+        if self.multi_class == 'multinomial':
+            proba = np.exp(scores - scores.max(axis=-1, keepdims=True))
+        else:
+            proba = 1.0 / (1.0 + np.exp(-scores))
+        proba /= proba.sum(axis=-1, keepdims=True)
+        return proba
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Export a pickled linear classifier to a .npz file')
+    parser.add_argument('model', help='pickled sklearn model')
+    parser.add_argument('output', nargs='?', default=None)
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        output = os.path.splitext(args.model)[0] + '.npz'
+
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    export_model(model, output)
+    print('wrote ' + output)
+
+
+if __name__ == '__main__':
+    main()
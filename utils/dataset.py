@@ -0,0 +1,316 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import shutil
+import struct
+import threading
+
+import numpy as np
+
+from utils.landmarks import NUM_LANDMARKS
+
+NUM_FEATURES = NUM_LANDMARKS * 2
+
+# dataset directory: header.json plus features.npy (float32, rows x
+# features) and labels.npy (int32), loadable with np.load(mmap_mode='r')
+DATASET_FORMAT = 'keypoint-dataset'
+DATASET_VERSION = 1
+HEADER_NAME = 'header.json'
+FEATURES_NAME = 'features.npy'
+LABELS_NAME = 'labels.npy'
+
+# binary append format: 12 byte header, then fixed size little-endian
+# records of one int32 label and NUM_FEATURES float32 values
+BINARY_MAGIC = b'KPTS'
+BINARY_VERSION = 1
+_HEADER = struct.Struct('<4sII')
+
+
+def record_dtype(num_features=NUM_FEATURES):
+    return np.dtype([('label', '<i4'), ('features', '<f4', (num_features,))])
+
+
+def _read_header(f):
+    data = f.read(_HEADER.size)
+    if len(data) != _HEADER.size:
+        raise ValueError('truncated header')
+    magic, version, num_features = _HEADER.unpack(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError('not a keypoint record file')
+    return num_features
+
+
+def is_record_file(path):
+    with open(path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def _record_layout(path):
+    # (dtype, complete rows) from the header and the file size alone; a
+    # torn last record from a crash is not counted
+    with open(path, 'rb') as f:
+        num_features = _read_header(f)
+    dtype = record_dtype(num_features)
+    size = os.path.getsize(path) - _HEADER.size
+    return dtype, size // dtype.itemsize
+
+
+def read_records(path, start=0):
+    # rows from `start` on
+    dtype, rows = _record_layout(path)
+    count = max(rows - start, 0)
+    records = np.fromfile(path, dtype=dtype, count=count,
+                          offset=_HEADER.size + start * dtype.itemsize)
+    return records['label'], records['features']
+
+
+class DatasetWriter(object):
+    def __init__(self, path='data/keypoints.csv', binary=None,
+                 flush_interval=0.5, batch_size=256,
+                 num_features=NUM_FEATURES):
+        self.path = path
+        if binary is None:
+            binary = not path.lower().endswith('.csv')
+        self.binary = binary
+        # rows reach the file at most flush_interval seconds after write()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.num_features = num_features
+        self._dtype = record_dtype(num_features)
+
+        self.rows_written = 0
+        self.flushes = 0
+        self.error = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = self._open()
+        self._csv = None if binary else csv.writer(self._file)
+
+        self._rows = []
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        if not self.binary:
+            return open(self.path, 'a', newline='')
+
+        f = open(self.path, 'a+b')
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            f.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION,
+                                 self.num_features))
+        else:
+            f.seek(0)
+            num_features = _read_header(f)
+            if num_features != self.num_features:
+                f.close()
+                raise ValueError('{} holds {} features per row, not {}'.format(
+                    self.path, num_features, self.num_features))
+            # drop a torn record left by an earlier crash
+            itemsize = self._dtype.itemsize
+            size = os.path.getsize(self.path) - _HEADER.size
+            f.truncate(_HEADER.size + size // itemsize * itemsize)
+        return f
+
+    @property
+    def pending(self):
+        return len(self._rows)
+
+    def write(self, label, features):
+        if self.error is not None:
+            raise self.error
+        # copy, the caller may reuse its buffer for the next frame
+        row = (label, np.array(features, dtype=np.float32))
+        with self._cond:
+            if self._closing:
+                raise ValueError('write to closed DatasetWriter')
+            self._rows.append(row)
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closing and len(self._rows) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                rows, self._rows = self._rows, []
+                closing = self._closing
+            if rows:
+                try:
+                    self._write_rows(rows)
+                except Exception as e:
+                    self.error = e
+                    return
+            if closing:
+                return
+
+    def _write_rows(self, rows):
+        if self.binary:
+            records = np.empty(len(rows), dtype=self._dtype)
+            for index, (label, features) in enumerate(rows):
+                records[index] = (label, features)
+            self._file.write(records.tobytes())
+        else:
+            self._csv.writerows([label, *features] for label, features in rows)
+        self._file.flush()
+        self.rows_written += len(rows)
+        self.flushes += 1
+
+    def close(self):
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        # make the session durable before reporting it saved
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_header(path):
+    with open(os.path.join(path, HEADER_NAME)) as f:
+        header = json.load(f)
+    if header.get('format') != DATASET_FORMAT:
+        raise ValueError(path + ' is not a keypoint dataset')
+    if header.get('version') != DATASET_VERSION:
+        raise ValueError('{}: unsupported dataset version {}'.format(
+            path, header.get('version')))
+    return header
+
+
+def load_dataset(path, mmap=True):
+    # returns (labels, features) for a dataset directory, a binary record
+    # file or a CSV, memory-mapped where the format allows it
+    if os.path.isdir(path):
+        header = read_header(path)
+        mmap_mode = 'r' if mmap else None
+        features = np.load(os.path.join(path, FEATURES_NAME),
+                           mmap_mode=mmap_mode)
+        labels = np.load(os.path.join(path, LABELS_NAME), mmap_mode=mmap_mode)
+        if features.shape != (header['rows'], header['num_features']) or \
+                labels.shape != (header['rows'],):
+            raise ValueError(path + ': arrays do not match header.json')
+        return labels, features
+
+    if path.lower().endswith('.csv'):
+        data = np.loadtxt(path, delimiter=',', dtype=np.float32, ndmin=2)
+        return data[:, 0].astype(np.int32), np.ascontiguousarray(data[:, 1:])
+
+    return read_records(path)
+
+
+def _count_rows(path):
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def _csv_chunks(path, chunk_rows):
+    with open(path) as f:
+        lines = (line for line in f if line.strip())
+        while True:
+            chunk = list(itertools.islice(lines, chunk_rows))
+            if not chunk:
+                return
+            yield np.loadtxt(chunk, delimiter=',', dtype=np.float32, ndmin=2)
+
+
+def _record_chunks(path, dtype, rows, chunk_rows):
+    if rows == 0:
+        return
+    # only the chunk being copied is paged in
+    records = np.memmap(path, dtype=dtype, mode='r', offset=_HEADER.size,
+                        shape=(rows,))
+    for start in range(0, rows, chunk_rows):
+        chunk = records[start:start + chunk_rows]
+        yield np.column_stack((chunk['label'], chunk['features']))
+
+
+def convert(source, destination, chunk_rows=65536):
+    if source.lower().endswith('.csv'):
+        rows = _count_rows(source)
+        chunks = _csv_chunks(source, chunk_rows)
+        with open(source) as f:
+            first = f.readline()
+        num_features = len(first.split(',')) - 1 if first else NUM_FEATURES
+    else:
+        dtype, rows = _record_layout(source)
+        num_features = dtype['features'].shape[0]
+        chunks = _record_chunks(source, dtype, rows, chunk_rows)
+
+    # built next to the destination and renamed into place, so a reader
+    # never sees a half written dataset
+    partial = destination.rstrip(os.sep) + '.partial'
+    if os.path.exists(partial):
+        shutil.rmtree(partial)
+    os.makedirs(partial)
+
+    features = np.lib.format.open_memmap(
+        os.path.join(partial, FEATURES_NAME), mode='w+', dtype=np.float32,
+        shape=(rows, num_features))
+    labels = np.lib.format.open_memmap(
+        os.path.join(partial, LABELS_NAME), mode='w+', dtype=np.int32,
+        shape=(rows,))
+    start = 0
+    for chunk in chunks:
+        stop = start + len(chunk)
+        labels[start:stop] = chunk[:, 0]
+        features[start:stop] = chunk[:, 1:]
+        start = stop
+    if start != rows:
+        raise ValueError('{}: expected {} rows, read {}'.format(
+            source, rows, start))
+    features.flush()
+    labels.flush()
+    del features, labels
+
+    header = {
+        'format': DATASET_FORMAT,
+        'version': DATASET_VERSION,
+        'rows': rows,
+        'num_features': num_features,
+        'feature_dtype': 'float32',
+        'label_dtype': 'int32',
+        'source': os.path.basename(source),
+    }
+    with open(os.path.join(partial, HEADER_NAME), 'w') as f:
+        json.dump(header, f, indent=2)
+
+    if os.path.exists(destination):
+        shutil.rmtree(destination)
+    os.rename(partial, destination)
+    return header
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert a keypoint CSV or binary record file to a '
+                    'memory-mappable dataset directory')
+    parser.add_argument('source')
+    parser.add_argument('destination', nargs='?', default=None)
+    args = parser.parse_args()
+
+    destination = args.destination
+    if destination is None:
+        destination = os.path.splitext(args.source)[0]
+    header = convert(args.source, destination)
+    print('wrote {} rows to {}'.format(header['rows'], destination))
+
+
+if __name__ == '__main__':
+    main()
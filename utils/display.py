@@ -0,0 +1,85 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+import cv2 as cv
+
+
+def display_available():
+    # no X11/Wayland session means cv.imshow has nowhere to go
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or
+                    os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+
+class DisplayThread(object):
+    def __init__(self, render, window_name, max_fps=15.0):
+        # render(frame, overlay) -> image, called on the display thread
+        self.render = render
+        self.window_name = window_name
+        self.max_fps = max_fps
+
+        self.frames_submitted = 0
+        self.frames_shown = 0
+
+        self._cond = threading.Condition()
+        self._item = None
+        self._submitted_at = float('-inf')
+        self._keys = collections.deque(maxlen=16)
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def due(self):
+        # lets the caller skip building the overlay for frames that would
+        # be dropped anyway
+        if self.max_fps <= 0:
+            return True
+        return time.perf_counter() - self._submitted_at >= 1.0 / self.max_fps
+
+    def submit(self, frame, overlay):
+        # copied, the capture and preprocessing buffers are reused
+        frame = frame.copy()
+        with self._cond:
+            self._item = (frame, overlay)
+            self._submitted_at = time.perf_counter()
+            self.frames_submitted += 1
+            self._cond.notify()
+
+    def poll_key(self):
+        try:
+            return self._keys.popleft()
+        except IndexError:
+            return -1
+
+    def _run(self):
+        while self._running:
+            with self._cond:
+                if self._item is None:
+                    # wake up regularly, waitKey also runs the window's
+                    # event loop
+                    self._cond.wait(0.05)
+                item, self._item = self._item, None
+            if item is not None:
+                cv.imshow(self.window_name, self.render(*item))
+                self.frames_shown += 1
+            key = cv.waitKey(1)
+            if key != -1:
+                self._keys.append(key)
+        cv.destroyWindow(self.window_name)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,47 +1,198 @@
 from collections import deque
 import time
 
+import numpy as np
+
+from utils.tracking import HandTracker
 
-class CommandGenerator:
-    gestures = deque([])
-    last_command_time = 0
 
-    def __init__(self, deque_size=10, command_interval=1, vote_threshold=0.7):
+class CommandGenerator:
+    def __init__(self, deque_size=10, command_interval=1, vote_threshold=0.7,
+                 clock=time.time, commands=(2, 3, 4, 5, 6)):
         self.deque_size = deque_size
         self.command_interval = command_interval
         self.vote_count = vote_threshold*deque_size
+        self.clock = clock
+        # None lets every label vote, otherwise ties go to the earlier entry
+        self.commands = None if commands is None else tuple(commands)
+        self._priority = (None if commands is None else
+                          {command: index for index, command in
+                           enumerate(self.commands)})
+
+        self.gestures = deque([])
+        self.last_command_time = float('-inf')
+        self._counts = {}
+        # labels whose count is at or above vote_count
+        self._qualified = set()
+
+    def _votes(self, gesture):
+        if self._priority is None:
+            return True
+        return gesture in self._priority
+
+    def _increment(self, gesture):
+        count = self._counts.get(gesture, 0) + 1
+        self._counts[gesture] = count
+        if count >= self.vote_count and self._votes(gesture):
+            self._qualified.add(gesture)
+
+    def _decrement(self, gesture):
+        count = self._counts[gesture] - 1
+        if count:
+            self._counts[gesture] = count
+        else:
+            del self._counts[gesture]
+        if count < self.vote_count:
+            self._qualified.discard(gesture)
 
     def add_gestures(self, gesture):
-        if time.time() - self.last_command_time > self.command_interval:
+        if self.clock() - self.last_command_time > self.command_interval:
             self.gestures.append(gesture)
+            self._increment(gesture)
             if len(self.gestures) > self.deque_size:
-                self.gestures.popleft()
+                self._decrement(self.gestures.popleft())
+
+    def clear(self):
+        self.gestures.clear()
+        self._counts.clear()
+        self._qualified.clear()
 
     def get_command(self):
-        current_time = time.time()
+        current_time = self.clock()
         if current_time - self.last_command_time > self.command_interval:
-            
+
             majority_vote = self.get_majority_vote()
             # open and close gestures
             if majority_vote == -1:
                 return -1
             else:
-                self.last_command_time = time.time()
-                self.gestures.clear()
+                self.last_command_time = self.clock()
+                self.clear()
                 return majority_vote
         # it has not been long enough since last command
         else:
             return -1
 
     def get_majority_vote(self):
-        if self.gestures.count(2) >= self.vote_count:
-            return 2
-        elif self.gestures.count(3) >= self.vote_count:
-            return 3
-        elif self.gestures.count(4) >= self.vote_count:
-            return 4
-        elif self.gestures.count(5) >= self.vote_count:
-            return 5
-        elif self.gestures.count(6) >= self.vote_count:
-            return 6
+        if not self._qualified:
+            return -1
+        if len(self._qualified) == 1:
+            return next(iter(self._qualified))
+        # only possible with vote_threshold <= 0.5
+        if self._priority is None:
+            return min(self._qualified)
+        return min(self._qualified, key=self._priority.get)
+
+    def observe(self, classifier, features):
+        gestures = classifier.predict(features)
+        return gestures, gestures
+
+    def classify(self, classifier, features):
+        gesture, observation = self.observe(classifier, features)
+        self.add_gestures(observation)
+        return gesture
+
+
+class PosteriorDecoder:
+    def __init__(self, classes, smoothing=0.5, confidence=0.8,
+                 command_interval=1, clock=time.time,
+                 commands=(2, 3, 4, 5, 6)):
+        self.classes = np.asarray(classes)
+        # weight of the newest probability vector in the running posterior
+        self.smoothing = smoothing
+        self.confidence = confidence
+        self.command_interval = command_interval
+        self.clock = clock
+        self.commands = None if commands is None else tuple(commands)
+
+        self.posterior = np.zeros(len(self.classes))
+        self.last_command_time = float('-inf')
+        # classes that are not commands can hold the posterior but never fire
+        self._floor = np.zeros(len(self.classes))
+        if commands is not None:
+            self._floor[~np.isin(self.classes, self.commands)] = -np.inf
+
+    def add_gestures(self, probabilities):
+        if self.clock() - self.last_command_time > self.command_interval:
+            self.posterior *= 1.0 - self.smoothing
+            self.posterior += self.smoothing * np.asarray(probabilities)
+
+    def clear(self):
+        self.posterior[:] = 0.0
+
+    def get_command(self):
+        current_time = self.clock()
+        if current_time - self.last_command_time > self.command_interval:
+            command = self.get_majority_vote()
+            if command != -1:
+                self.last_command_time = self.clock()
+                self.clear()
+            return command
+        return -1
+
+    def get_majority_vote(self):
+        index = (self.posterior + self._floor).argmax()
+        if self.posterior[index] >= self.confidence:
+            return self.classes[index].item()
         return -1
+
+    def observe(self, classifier, features):
+        probabilities = classifier.predict_proba(features)
+        return self.classes[probabilities.argmax(axis=-1)], probabilities
+
+    def classify(self, classifier, features):
+        gesture, observation = self.observe(classifier, features)
+        self.add_gestures(observation)
+        return gesture
+
+
+class MultiHandDecoder:
+    def __init__(self, factory, tracker=None):
+        # one decoder per tracked hand, created on first sight
+        self.factory = factory
+        self.tracker = HandTracker() if tracker is None else tracker
+        self.decoders = {}
+        self.hand_ids = []
+        self._prototype = factory()
+
+    def _decoder(self, hand_id):
+        decoder = self.decoders.get(hand_id)
+        if decoder is None:
+            decoder = self.decoders[hand_id] = self.factory()
+        return decoder
+
+    def add_gestures(self, observations, points):
+        self.hand_ids = self.tracker.update(points)
+        for hand_id in self.tracker.expired:
+            self.decoders.pop(hand_id, None)
+        for hand_id, observation in zip(self.hand_ids, observations):
+            self._decoder(hand_id).add_gestures(observation)
+
+    def classify(self, classifier, features, points):
+        # every hand in the frame goes through the classifier in one call
+        gestures, observations = self._prototype.observe(classifier, features)
+        self.add_gestures(observations, points)
+        return gestures
+
+    def get_commands(self):
+        commands = []
+        for hand_id in self.hand_ids:
+            command = self.decoders[hand_id].get_command()
+            if command != -1:
+                commands.append(command)
+        return commands
+
+
+DECODERS = ('vote', 'posterior')
+
+
+def create_decoder(name, classes, **kwargs):
+    if name == 'posterior':
+        return PosteriorDecoder(classes, **kwargs)
+    if name == 'vote':
+        return CommandGenerator(**kwargs)
+    raise ValueError('unknown decoder ' + repr(name))
+
+
+def create_multi_hand_decoder(name, classes, **kwargs):
+    return MultiHandDecoder(lambda: create_decoder(name, classes, **kwargs))
@@ -0,0 +1,52 @@
+import queue
+import time
+
+
+class EdgeReceiver(object):
+    def __init__(self, gpio=None, bouncetime=None, instrumentation=None):
+        if gpio is None:
+            import RPi.GPIO as gpio
+        self.gpio = gpio
+        self.bouncetime = bouncetime
+        self.instrumentation = instrumentation
+        self.handled = 0
+        self._handlers = {}
+        self._edges = queue.Queue()
+
+    def on_falling(self, pin, handler):
+        # handler(pin) runs on the thread that calls run(), not on the
+        # RPi.GPIO callback thread
+        self._handlers[pin] = handler
+        kwargs = {}
+        if self.bouncetime is not None:
+            kwargs['bouncetime'] = self.bouncetime
+        self.gpio.add_event_detect(pin, self.gpio.FALLING,
+                                   callback=self._on_edge, **kwargs)
+
+    def _on_edge(self, pin):
+        # only timestamp and queue the edge, so a slow handler does not
+        # hold up the detection of the next one
+        self._edges.put((pin, time.perf_counter()))
+
+    def run(self, stop=None, timeout=0.5):
+        # sleeps in the queue until an edge arrives; the timeout only
+        # bounds how long a stop request can go unnoticed
+        while stop is None or not stop.is_set():
+            try:
+                pin, edge_at = self._edges.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            if pin is None:
+                break
+            started = time.perf_counter()
+            self._handlers[pin](pin)
+            self.handled += 1
+            if self.instrumentation is not None:
+                self.instrumentation.record('edge_to_action',
+                                            started - edge_at)
+                self.instrumentation.record('action',
+                                            time.perf_counter() - started)
+
+    def close(self):
+        # wakes run() up straight away
+        self._edges.put((None, None))
@@ -0,0 +1,126 @@
+import bisect
+import math
+import time
+
+import numpy as np
+
+
+class LatencyHistogram(object):
+    def __init__(self, min_ms=0.01, max_ms=10000.0, buckets_per_decade=20):
+        decades = math.log10(max_ms / min_ms)
+        size = int(round(decades * buckets_per_decade))
+        self._edges = np.logspace(math.log10(min_ms), math.log10(max_ms),
+                                  size + 1).tolist()
+        # one extra bucket on each side for under/overflow
+        self._counts = [0] * (size + 2)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, milliseconds):
+        self._counts[bisect.bisect_left(self._edges, milliseconds)] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+        if milliseconds > self.max_ms:
+            self.max_ms = milliseconds
+
+    def percentile(self, q):
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, bucket in enumerate(self._counts):
+            seen += bucket
+            if seen >= rank and bucket:
+                if index >= len(self._edges):
+                    return self.max_ms
+                # upper edge of the bucket, clamped to what was observed
+                return min(self._edges[index], self.max_ms)
+        return self.max_ms
+
+    def mean(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def reset(self):
+        self._counts = [0] * len(self._counts)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class Instrumentation(object):
+    def __init__(self, refresh_interval=1.0):
+        self.histograms = {}
+        self.refresh_interval = refresh_interval
+        self._lines = []
+        self._lines_at = 0.0
+        self._dumped_at = time.perf_counter()
+        # (name, func) pairs whose text is added to the periodic dump
+        self.gauges = []
+
+    def record(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(seconds * 1000.0)
+
+    def timer(self):
+        return StageTimer(self)
+
+    def report(self):
+        return {
+            name: {
+                'count': histogram.count,
+                'mean_ms': histogram.mean(),
+                'p50_ms': histogram.percentile(50),
+                'p95_ms': histogram.percentile(95),
+                'p99_ms': histogram.percentile(99),
+                'max_ms': histogram.max_ms,
+            }
+            for name, histogram in self.histograms.items()
+        }
+
+    def format_lines(self):
+        lines = []
+        for name, stats in self.report().items():
+            lines.append('{:<16} p50 {:6.1f}  p95 {:6.1f}  p99 {:6.1f} ms'.format(
+                name, stats['p50_ms'], stats['p95_ms'], stats['p99_ms']))
+        return lines
+
+    def overlay_lines(self):
+        # percentiles are only recomputed every refresh_interval seconds
+        now = time.perf_counter()
+        if now - self._lines_at >= self.refresh_interval:
+            self._lines = self.format_lines()
+            self._lines_at = now
+        return self._lines
+
+    def add_gauge(self, name, func):
+        self.gauges.append((name, func))
+
+    def gauge_lines(self):
+        return ['{:<16} {}'.format(name, func()) for
+                name, func in self.gauges]
+
+    def dump_if_due(self, interval):
+        now = time.perf_counter()
+        if now - self._dumped_at < interval:
+            return False
+        self._dumped_at = now
+        print('\n'.join(['stage latency'] + self.format_lines() +
+                        self.gauge_lines()))
+        return True
+
+
+class StageTimer(object):
+    def __init__(self, instrumentation):
+        self._instrumentation = instrumentation
+        self._last = time.perf_counter()
+
+    def start(self):
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self._instrumentation.record(name, now - self._last)
+        self._last = now
@@ -0,0 +1,52 @@
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+def landmarks_to_array(landmarks, out=None):
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 2), dtype=np.float32)
+    out[:] = [(landmark.x, landmark.y) for landmark in landmarks.landmark]
+    return out
+
+
+def _image_scale(image_width, image_height):
+    return np.array((image_width, image_height), dtype=np.float32)
+
+
+def calc_landmark_list(points, image_width, image_height):
+    # integer pixel coordinates, only needed for drawing
+    scale = _image_scale(image_width, image_height)
+    pixels = (np.asarray(points, dtype=np.float32) * scale).astype(np.int32)
+    return np.minimum(pixels, (scale - 1).astype(np.int32), out=pixels)
+
+
+def calc_bounding_rect(points, image_width, image_height):
+    pixels = calc_landmark_list(points, image_width, image_height)
+    top_left = pixels.min(axis=-2)
+    bottom_right = pixels.max(axis=-2) + 1
+    return np.concatenate((top_left, bottom_right), axis=-1)
+
+
+def pre_process_landmark(points, image_width=1, image_height=1):
+    points = np.asarray(points, dtype=np.float32)
+
+    # relative to the wrist, in pixel units so the aspect ratio matches
+    # the features the classifier was trained on
+    relative = points * _image_scale(image_width, image_height)
+    relative -= relative[..., :1, :]
+
+    features = relative.reshape(points.shape[:-2] + (NUM_LANDMARKS * 2,))
+    max_value = np.abs(features).max(axis=-1, keepdims=True)
+    np.divide(features, max_value, out=features, where=max_value > 0)
+
+    return features
+
+
+def hands_to_array(multi_hand_landmarks):
+    # (N, 21, 2) for every detected hand, N = 0 when there are none
+    count = len(multi_hand_landmarks) if multi_hand_landmarks else 0
+    points = np.empty((count, NUM_LANDMARKS, 2), dtype=np.float32)
+    for index in range(count):
+        landmarks_to_array(multi_hand_landmarks[index], out=points[index])
+    return points
@@ -0,0 +1,174 @@
+import io
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+from utils.classifier import export_model
+from utils.dataset import is_record_file, read_records
+
+
+def _replace_pickle(model, path):
+    partial = path + '.partial'
+    with open(partial, 'wb') as f:
+        pickle.dump(model, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+
+def _replace_npz(model, path):
+    # np.savez only keeps the name when it already ends in .npz
+    partial = path[:-len('.npz')] + '.partial.npz'
+    export_model(model, partial)
+    os.replace(partial, path)
+
+
+def read_new_rows(path, offset):
+    # rows appended after `offset` (a row count for binary record files,
+    # a byte offset for CSV); returns (labels, features, new_offset), a
+    # partly written last row is left for the next call
+    if is_record_file(path):
+        labels, features = read_records(path, start=offset)
+        return labels, features, offset + len(labels)
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        return np.empty(0, np.int32), np.empty((0, 0), np.float32), offset
+    rows = np.loadtxt(io.BytesIO(data[:end]), delimiter=',',
+                      dtype=np.float32, ndmin=2)
+    return rows[:, 0].astype(np.int32), rows[:, 1:], offset + end
+
+
+class OnlineTrainer(object):
+    def __init__(self, checkpoint='models/online', classes=range(7),
+                 augmenter=None, copies=0, epochs=5, replay_size=2000,
+                 alpha=1e-4, seed=0):
+        self.checkpoint = checkpoint
+        self.classes = np.asarray(list(classes))
+        # optional KeypointAugmenter, `copies` extra rows per new row
+        self.augmenter = augmenter
+        self.copies = copies
+        # passes over each batch of new rows
+        self.epochs = epochs
+        self.rng = np.random.default_rng(seed)
+        # a bounded reservoir of earlier rows is mixed into every update,
+        # so a session that only recorded one gesture does not make the
+        # model forget the others; its cost does not grow with history
+        self.replay_size = replay_size
+        self.replay_labels = np.empty(0, dtype=np.int32)
+        self.replay_features = np.empty((0, 0), dtype=np.float32)
+
+        self.state = {'sources': {}, 'updates': 0, 'rows_seen': 0}
+        if os.path.exists(self.model_path):
+            with open(self.model_path, 'rb') as f:
+                self.model = pickle.load(f)
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+            if os.path.exists(self.replay_path):
+                with np.load(self.replay_path) as data:
+                    self.replay_labels = data['labels']
+                    self.replay_features = data['features']
+        else:
+            # log loss so predict_proba (and the posterior decoder) works
+            self.model = SGDClassifier(loss='log_loss', alpha=alpha,
+                                       random_state=seed)
+
+    @property
+    def model_path(self):
+        return self.checkpoint + '.pkl'
+
+    @property
+    def npz_path(self):
+        return self.checkpoint + '.npz'
+
+    @property
+    def state_path(self):
+        return self.checkpoint + '_state.json'
+
+    @property
+    def replay_path(self):
+        return self.checkpoint + '_replay.npz'
+
+    def _remember(self, labels, features):
+        # reservoir sampling over every row ever seen
+        seen = self.state['rows_seen']
+        keep_labels = list(self.replay_labels)
+        keep_features = list(self.replay_features)
+        for index in range(len(labels)):
+            if len(keep_labels) < self.replay_size:
+                keep_labels.append(labels[index])
+                keep_features.append(features[index])
+            else:
+                slot = self.rng.integers(seen + index + 1)
+                if slot < self.replay_size:
+                    keep_labels[slot] = labels[index]
+                    keep_features[slot] = features[index]
+        self.replay_labels = np.array(keep_labels, dtype=np.int32)
+        self.replay_features = np.array(keep_features, dtype=np.float32)
+
+    def partial_fit(self, labels, features):
+        new_labels, new_features = labels, features
+        if len(self.replay_labels):
+            count = min(len(labels), len(self.replay_labels))
+            index = self.rng.choice(len(self.replay_labels), count,
+                                    replace=False)
+            labels = np.concatenate((labels, self.replay_labels[index]))
+            features = np.concatenate((features,
+                                       self.replay_features[index]))
+        for _ in range(self.epochs):
+            if self.augmenter is not None and self.copies:
+                # fresh augmented copies every epoch, generated and fitted
+                # one batch at a time rather than all held in memory
+                for batch_labels, batch in self.augmenter.batches(
+                        labels, features, epochs=self.copies):
+                    self.model.partial_fit(batch, batch_labels,
+                                           classes=self.classes)
+            order = self.rng.permutation(len(labels))
+            self.model.partial_fit(features[order], labels[order],
+                                   classes=self.classes)
+
+        self._remember(new_labels, new_features)
+        self.state['updates'] += 1
+        self.state['rows_seen'] += len(new_labels)
+
+    def update(self, path):
+        # only the rows added to `path` since the last checkpoint are read
+        key = os.path.abspath(path)
+        source = self.state['sources'].get(key, {'offset': 0})
+        if os.path.getsize(path) < source.get('size', 0):
+            # the file was replaced, start again from its first row
+            source['offset'] = 0
+        labels, features, offset = read_new_rows(path, source['offset'])
+        if len(labels) == 0:
+            return 0
+
+        self.partial_fit(labels, features)
+        source['offset'] = offset
+        source['size'] = os.path.getsize(path)
+        source['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.state['sources'][key] = source
+        self.save()
+        return len(labels)
+
+    def save(self):
+        directory = os.path.dirname(self.checkpoint)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # the .npz is what running detectors reload, it is replaced last
+        _replace_pickle(self.model, self.model_path)
+        partial = self.state_path + '.partial'
+        with open(partial, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(partial, self.state_path)
+        partial = self.replay_path[:-len('.npz')] + '.partial.npz'
+        np.savez(partial, labels=self.replay_labels,
+                 features=self.replay_features)
+        os.replace(partial, self.replay_path)
+        _replace_npz(self.model, self.npz_path)
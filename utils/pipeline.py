@@ -0,0 +1,297 @@
+import multiprocessing as mp
+import queue
+import signal
+import time
+from multiprocessing import shared_memory
+
+import cv2 as cv
+import numpy as np
+
+from utils.camera import CameraStream
+from utils.classifier import KeypointClassifier
+from utils.generate_commands import create_multi_hand_decoder
+from utils.instrumentation import LatencyHistogram
+from utils.landmarks import hands_to_array, pre_process_landmark
+from utils.startup import create_hands
+from utils.scheduler import InferenceScheduler, STATES
+from utils.roi import RoiTracker
+from utils.shutdown import StopSignal
+
+
+STAT_NAMES = ('captured', 'capture_dropped', 'capture_recycled',
+              'stale_skipped', 'inferred', 'skipped', 'inference_rate',
+              'scheduler_state', 'frame_age_p50_ms', 'frame_age_p95_ms',
+              'results_dropped', 'commands', 'last_latency_ms')
+
+
+class PipelineStats(object):
+    def __init__(self):
+        # one writer per counter, so no lock is needed
+        self._values = mp.RawArray('d', len(STAT_NAMES))
+
+    def add(self, name, value=1):
+        self._values[STAT_NAMES.index(name)] += value
+
+    def set(self, name, value):
+        self._values[STAT_NAMES.index(name)] = value
+
+    def as_dict(self):
+        values = dict(zip(STAT_NAMES, self._values))
+        # stored as an index into the scheduler states
+        values['scheduler_state'] = STATES[int(values['scheduler_state'])]
+        return values
+
+
+class SharedFrameRing(object):
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        nbytes = slots * int(np.prod(self.shape))
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8,
+                                  buffer=self._shm.buf)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def spec(self):
+        return self.slots, self.shape, self.name
+
+    @classmethod
+    def attach(cls, spec):
+        slots, shape, name = spec
+        return cls(slots, shape, name=name)
+
+    def frame(self, slot):
+        return self._frames[slot]
+
+    def close(self):
+        self._frames = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _ignore_sigint():
+    # the parent owns shutdown and tells the stages through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+
+def _put_sentinel(stage_queue):
+    # a full queue means the consumer is gone or stopping anyway
+    try:
+        stage_queue.put_nowait(None)
+    except queue.Full:
+        pass
+
+
+def _claim_slot(free_slots, frames, stats):
+    try:
+        return free_slots.get_nowait()
+    except queue.Empty:
+        pass
+    # inference is behind: overwrite the oldest frame it has not claimed
+    # yet instead of dropping the new one, so it only ever sees recent
+    # frames
+    try:
+        item = frames.get_nowait()
+    except queue.Empty:
+        return None
+    if item is None:
+        # the stop sentinel, leave it for inference
+        _put_sentinel(frames)
+        return None
+    stats.add('capture_recycled')
+    return item[0]
+
+
+def _newest_frame(item, free_slots, frames, stats):
+    # latest-frame handoff: anything queued behind `item` is newer, skip
+    # to the newest and give the older slots back to capture
+    while True:
+        try:
+            newer = frames.get_nowait()
+        except queue.Empty:
+            return item
+        if newer is None:
+            _put_sentinel(frames)
+            return item
+        free_slots.put(item[0])
+        stats.add('stale_skipped')
+        item = newer
+
+
+def capture_stage(ring_spec, free_slots, frames, stop_event, stats,
+                  cap_device, cap_width, cap_height, mirror_input):
+    _ignore_sigint()
+    frames.cancel_join_thread()
+    ring = SharedFrameRing.attach(ring_spec)
+    height, width = ring.shape[:2]
+    cap = CameraStream(cap_device, cap_width, cap_height).start()
+    mirrored = None
+
+    while not stop_event.is_set():
+        ret, image = cap.read(timeout=0.5)
+        if not ret:
+            if not cap.running:
+                break
+            continue
+        slot = _claim_slot(free_slots, frames, stats)
+        if slot is None:
+            # every slot is in flight, never block the camera on it
+            stats.add('capture_dropped')
+            continue
+
+        if image.shape[:2] != (height, width):
+            image = cv.resize(image, (width, height))
+        if mirror_input:
+            mirrored = cv.flip(image, 1, dst=mirrored)
+            image = mirrored
+        cv.cvtColor(image, cv.COLOR_BGR2RGB, dst=ring.frame(slot))
+
+        frames.put((slot, cap.sequence, time.perf_counter()))
+        stats.add('captured')
+
+    cap.release()
+    _put_sentinel(frames)
+    ring.close()
+
+
+def inference_stage(ring_spec, free_slots, frames, results, stop_event,
+                    stats, hands_kwargs, model_path, use_roi, decoder,
+                    watch_model):
+    _ignore_sigint()
+    free_slots.cancel_join_thread()
+    results.cancel_join_thread()
+    ring = SharedFrameRing.attach(ring_spec)
+    height, width = ring.shape[:2]
+    hands = create_hands(warmup_shape=ring.shape, **hands_kwargs)
+    classifier = KeypointClassifier(model_path)
+    process = hands.process
+    if use_roi:
+        process = RoiTracker(process).process
+    scheduler = InferenceScheduler(process)
+    # how old a frame is when inference starts on it
+    frame_age = LatencyHistogram()
+
+    while not stop_event.is_set():
+        try:
+            item = frames.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if item is None:
+            break
+        slot, seq, captured_at = _newest_frame(item, free_slots, frames,
+                                               stats)
+        frame_age.record((time.perf_counter() - captured_at) * 1000.0)
+        stats.set('frame_age_p50_ms', frame_age.percentile(50))
+        stats.set('frame_age_p95_ms', frame_age.percentile(95))
+
+        image = ring.frame(slot)
+        image.flags.writeable = False
+        hand_results = scheduler.process(image)
+        image.flags.writeable = True
+        free_slots.put(slot)
+        metrics = scheduler.metrics()
+        stats.set('inference_rate', metrics['inference_rate'])
+        stats.set('scheduler_state', STATES.index(metrics['state']))
+        if watch_model:
+            classifier.reload_if_changed()
+        if hand_results is None:
+            stats.add('skipped')
+            continue
+        stats.add('inferred')
+
+        # frames without hands are sent too, they age the hand tracks
+        points = hands_to_array(hand_results.multi_hand_landmarks)
+        features = pre_process_landmark(points, width, height)
+        # the posterior decoder consumes probability rows, not labels
+        if decoder == 'posterior':
+            observations = list(classifier.predict_proba(features))
+        else:
+            observations = classifier.predict(features).tolist()
+        try:
+            results.put_nowait((seq, captured_at, observations, points))
+        except queue.Full:
+            stats.add('results_dropped')
+
+    _put_sentinel(results)
+    hands.close()
+    ring.close()
+
+
+def actuation_stage(results, stop_event, stats, actuator_factory,
+                    model_path, decoder, commander_kwargs):
+    _ignore_sigint()
+    actuator = actuator_factory()
+    classes = KeypointClassifier(model_path).classes
+    commander = create_multi_hand_decoder(decoder, classes, **commander_kwargs)
+
+    while not stop_event.is_set():
+        try:
+            item = results.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if item is None:
+            break
+        _, captured_at, observations, points = item
+
+        commander.add_gestures(observations, points)
+        for command in commander.get_commands():
+            actuator(command)
+            stats.add('commands')
+            stats.set('last_latency_ms',
+                      (time.perf_counter() - captured_at) * 1000.0)
+
+
+def run_pipeline(actuator_factory, cap_device=0, cap_width=960,
+                 cap_height=540, mirror_input=True, hands_kwargs=None,
+                 model_path='models/logreg_complete.npz',
+                 use_roi=False, decoder='vote', commander_kwargs=None,
+                 slots=4, result_queue_size=64, control_socket=None,
+                 watch_model=False):
+    ring = SharedFrameRing(slots, (cap_height, cap_width, 3))
+    free_slots = mp.Queue()
+    for slot in range(slots):
+        free_slots.put(slot)
+    frames = mp.Queue(maxsize=slots)
+    results = mp.Queue(maxsize=result_queue_size)
+    stop_event = mp.Event()
+
+    stats = PipelineStats()
+
+    stages = [
+        mp.Process(target=capture_stage, name='capture', args=(
+            ring.spec(), free_slots, frames, stop_event, stats,
+            cap_device, cap_width, cap_height, mirror_input)),
+        mp.Process(target=inference_stage, name='inference', args=(
+            ring.spec(), free_slots, frames, results, stop_event, stats,
+            hands_kwargs or {}, model_path, use_roi, decoder, watch_model)),
+        mp.Process(target=actuation_stage, name='actuation', args=(
+            results, stop_event, stats, actuator_factory, model_path, decoder,
+            commander_kwargs or {})),
+    ]
+    for stage in stages:
+        stage.start()
+
+    stop = StopSignal(control_socket)
+    try:
+        while all(stage.is_alive() for stage in stages):
+            if stop.wait(0.5):
+                break
+    finally:
+        stop.close()
+        stop_event.set()
+        for stage in stages:
+            stage.join(timeout=2.0)
+            if stage.is_alive():
+                stage.terminate()
+        print('pipeline stats: ' + str(stats.as_dict()))
+        ring.close()
@@ -0,0 +1,108 @@
+import threading
+
+
+class PlaylistPlayer(object):
+    def __init__(self, plist, volume=40, step=20, autoplay=True):
+        import vlc
+
+        self.plist = list(plist)
+        self.step = step
+
+        # one libvlc instance and one media player for the whole session,
+        # switching tracks only swaps the media instead of opening a new
+        # player (and audio output) for every command
+        self.instance = vlc.Instance('--no-video', '--quiet')
+        self.media = [self.instance.media_new(path) for path in self.plist]
+        for media in self.media:
+            # parsed in the background now rather than on the first skip
+            media.parse_with_options(vlc.MediaParseFlag.local, 0)
+        self.media_list = self.instance.media_list_new()
+        for media in self.media:
+            self.media_list.add_media(media)
+
+        self.list_player = self.instance.media_list_player_new()
+        self.list_player.set_media_list(self.media_list)
+        self.list_player.set_playback_mode(vlc.PlaybackMode.loop)
+        self.player = self.list_player.get_media_player()
+
+        # cached instead of asking libvlc on every command
+        self._lock = threading.Lock()
+        self.volume = max(0, min(100, volume))
+        self.song_index = 0
+        self.playing = False
+        self.player.audio_set_volume(self.volume)
+
+        # the list player moves on by itself at the end of a track
+        self.player.event_manager().event_attach(
+            vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+
+        if autoplay:
+            self.play_song(0)
+
+    def _on_end_reached(self, event):
+        # runs on a libvlc thread; no lock and no libvlc calls here, the
+        # thread may be the one play_song is waiting on to stop
+        self.song_index = (self.song_index + 1) % len(self.plist)
+
+    def play_song(self, index):
+        with self._lock:
+            self.song_index = index % len(self.plist)
+            self.list_player.play_item_at_index(self.song_index)
+            self.player.audio_set_volume(self.volume)
+            self.playing = True
+
+    def next(self):
+        # past the last song wraps to the first
+        self.play_song(self.song_index + 1)
+
+    def previous(self):
+        # before the first song wraps to the last
+        self.play_song(self.song_index - 1)
+
+    def play_pause(self):
+        with self._lock:
+            if self.playing:
+                self.list_player.set_pause(1)
+            else:
+                self.list_player.play()
+            self.playing = not self.playing
+
+    def set_volume(self, volume):
+        with self._lock:
+            volume = max(0, min(100, volume))
+            if volume == self.volume:
+                return False
+            self.volume = volume
+            self.player.audio_set_volume(volume)
+            return True
+
+    def volume_up(self):
+        # already at max volume does nothing
+        return self.set_volume(self.volume + self.step)
+
+    def volume_down(self):
+        # already at min volume does nothing
+        return self.set_volume(self.volume - self.step)
+
+    def apply(self, command):
+        # the gesture command numbers, see utils/generate_commands.py
+        action = {
+            2: self.play_pause,
+            3: self.volume_up,
+            4: self.volume_down,
+            5: self.next,
+            6: self.previous,
+        }.get(command)
+        if action is None:
+            return False
+        action()
+        return True
+
+    def close(self):
+        with self._lock:
+            self.list_player.stop()
+            self.list_player.release()
+            self.media_list.release()
+            for media in self.media:
+                media.release()
+            self.instance.release()
@@ -0,0 +1,52 @@
+import cv2 as cv
+import numpy as np
+
+
+class FramePreprocessor(object):
+    def __init__(self, mirror_input=True):
+        self.mirror_input = mirror_input
+
+        self.debug_image = None
+        self.rgb_image = None
+
+        self.frames = 0
+        self.last_allocated_bytes = 0
+        self.total_allocated_bytes = 0
+
+    def _allocate(self, image):
+        self.debug_image = np.empty_like(image)
+        self.rgb_image = np.empty_like(image)
+        return self.debug_image.nbytes + self.rgb_image.nbytes
+
+    def process(self, image):
+        allocated = 0
+        if self.debug_image is None or self.debug_image.shape != image.shape:
+            allocated += self._allocate(image)
+
+        # mirrored view for drawing
+        debug_image = cv.flip(image, 1, dst=self.debug_image)
+
+        # inference input, converted straight into the preallocated buffer
+        self.rgb_image.flags.writeable = True
+        source = debug_image if self.mirror_input else image
+        rgb_image = cv.cvtColor(source, cv.COLOR_BGR2RGB, dst=self.rgb_image)
+
+        # OpenCV reallocates dst behind our back if it does not match
+        if debug_image is not self.debug_image:
+            allocated += debug_image.nbytes
+            self.debug_image = debug_image
+        if rgb_image is not self.rgb_image:
+            allocated += rgb_image.nbytes
+            self.rgb_image = rgb_image
+
+        self.frames += 1
+        self.last_allocated_bytes = allocated
+        self.total_allocated_bytes += allocated
+
+        return debug_image, rgb_image
+
+    def allocation_text(self):
+        # zero bytes per frame once the buffers exist
+        return '{} B last frame, {} B over {} frames'.format(
+            self.last_allocated_bytes, self.total_allocated_bytes,
+            self.frames)
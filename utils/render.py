@@ -0,0 +1,92 @@
+import cv2 as cv
+import numpy as np
+
+from utils.landmarks import NUM_LANDMARKS
+
+# the hand skeleton as open polylines over landmark indices, in the order
+# the bones have always been drawn: one chain per finger, then the palm
+# outline closed back at the wrist
+SKELETON = (
+    (2, 3, 4),
+    (5, 6, 7, 8),
+    (9, 10, 11, 12),
+    (13, 14, 15, 16),
+    (17, 18, 19, 20),
+    (0, 1, 2, 5, 9, 13, 17, 0),
+)
+
+FINGERTIPS = (4, 8, 12, 16, 20)
+JOINT_RADII = np.array([8 if index in FINGERTIPS else 5 for
+                        index in range(NUM_LANDMARKS)])
+
+BONE_COLOR = (255, 255, 255)
+OUTLINE_COLOR = (0, 0, 0)
+
+_CHAINS = [np.array(chain) for chain in SKELETON]
+
+
+def _disc(radius):
+    # the pixels of cv.circle(radius, filled) plus its 1 pixel outline,
+    # as offsets from the centre with their colour
+    size = 2 * radius + 3
+    mask = np.zeros((size, size), dtype=np.uint8)
+    centre = (radius + 1, radius + 1)
+    cv.circle(mask, centre, radius, 1, -1)
+    cv.circle(mask, centre, radius, 2, 1)
+    rows, cols = np.nonzero(mask)
+    colors = np.where((mask[rows, cols] == 1)[:, None], BONE_COLOR,
+                      OUTLINE_COLOR).astype(np.uint8)
+    return np.column_stack((cols, rows)) - centre, colors
+
+
+# every joint disc of one hand, in landmark order, so later joints cover
+# earlier ones exactly as the old one-circle-per-joint drawing did
+_discs = [_disc(radius) for radius in JOINT_RADII]
+_DISC_JOINTS = np.concatenate([np.full(len(offsets), index) for
+                               index, (offsets, _) in enumerate(_discs)])
+_DISC_OFFSETS = np.concatenate([offsets for offsets, _ in _discs])
+_DISC_COLORS = np.concatenate([colors for _, colors in _discs])
+_DISC_REACH = int(JOINT_RADII.max()) + 1
+del _discs
+
+
+def _hands(landmark_point):
+    points = np.asarray(landmark_point, dtype=np.int32)
+    if points.size == 0:
+        return points.reshape(0, NUM_LANDMARKS, 2)
+    return points.reshape(-1, NUM_LANDMARKS, 2)
+
+
+def draw_landmarks(image, landmark_point):
+    # landmark_point: (21, 2) pixels for one hand or (N, 21, 2) for several
+    image_height, image_width = image.shape[:2]
+    flat = None
+    if image.flags.c_contiguous:
+        flat = image.reshape(image_height * image_width, -1)
+        flat_offsets = (_DISC_OFFSETS[:, 1] * image_width +
+                        _DISC_OFFSETS[:, 0])
+
+    for hand in _hands(landmark_point):
+        # outline then fill per chain, so a later bone's outline covers an
+        # earlier bone's fill where they meet, as with one cv.line per bone
+        for chain in _CHAINS:
+            bones = [hand[chain]]
+            cv.polylines(image, bones, False, OUTLINE_COLOR, 6)
+            cv.polylines(image, bones, False, BONE_COLOR, 2)
+
+        # joints stamped with one indexed assignment
+        low = hand.min(axis=0) - _DISC_REACH
+        high = hand.max(axis=0) + _DISC_REACH
+        if (flat is not None and low.min() >= 0 and
+                high[0] < image_width and high[1] < image_height):
+            centres = hand[:, 1] * image_width + hand[:, 0]
+            flat[centres[_DISC_JOINTS] + flat_offsets] = _DISC_COLORS
+        else:
+            # near the border, clipped pixel by pixel
+            pixels = hand[_DISC_JOINTS] + _DISC_OFFSETS
+            inside = ((pixels[:, 0] >= 0) & (pixels[:, 0] < image_width) &
+                      (pixels[:, 1] >= 0) & (pixels[:, 1] < image_height))
+            image[pixels[inside, 1], pixels[inside, 0]] = \
+                _DISC_COLORS[inside]
+
+    return image
@@ -0,0 +1,75 @@
+import os
+import time
+
+import cv2 as cv
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class ReplaySource(object):
+    def __init__(self, path, realtime=False, fps=30.0):
+        self.path = path
+        self.realtime = realtime
+        self.fps = fps
+
+        self._cap = None
+        self._images = None
+        if os.path.isdir(path):
+            self._images = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            self._cap = cv.VideoCapture(path)
+            if not self._cap.isOpened():
+                raise IOError('cannot open ' + path)
+            self.fps = self._cap.get(cv.CAP_PROP_FPS) or fps
+
+        self._seq = 0
+        self._timestamp = 0.0
+        self._started_at = None
+
+    @property
+    def sequence(self):
+        return self._seq
+
+    @property
+    def timestamp(self):
+        return self._timestamp
+
+    def clock(self):
+        return self._timestamp
+
+    def _next(self):
+        if self._images is not None:
+            if self._seq >= len(self._images):
+                return False, None, 0.0
+            frame = cv.imread(self._images[self._seq])
+            return frame is not None, frame, self._seq / self.fps
+
+        ret, frame = self._cap.read()
+        timestamp = self._cap.get(cv.CAP_PROP_POS_MSEC) / 1000.0
+        if timestamp <= 0 and self._seq > 0:
+            # some containers report no position, fall back to the frame rate
+            timestamp = self._seq / self.fps
+        return ret, frame, timestamp
+
+    def read(self):
+        ret, frame, timestamp = self._next()
+        if not ret:
+            return False, None
+
+        if self.realtime:
+            now = time.perf_counter()
+            if self._started_at is None:
+                self._started_at = now - timestamp
+            delay = self._started_at + timestamp - now
+            if delay > 0:
+                time.sleep(delay)
+
+        self._seq += 1
+        self._timestamp = timestamp
+        return True, frame
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
@@ -0,0 +1,90 @@
+import numpy as np
+
+from utils.landmarks import landmarks_to_array
+
+
+class RoiTracker(object):
+    def __init__(self, process, margin=0.6, recenter_margin=0.15,
+                 max_area=0.6):
+        self._process = process
+        # crop = hand box grown by margin * box size on every side
+        self.margin = margin
+        # keep the crop still while the hand stays this far inside it, so
+        # MediaPipe's own tracking sees a stable image between frames
+        self.recenter_margin = recenter_margin
+        # above this fraction of the frame the crop is not worth it
+        self.max_area = max_area
+
+        self.roi = None
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.lost = 0
+
+    def reset(self):
+        self.roi = None
+
+    def process(self, image):
+        height, width = image.shape[:2]
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            crop = np.ascontiguousarray(image[y0:y1, x0:x1])
+            results = self._process(crop)
+            self.roi_frames += 1
+            if results.multi_hand_landmarks:
+                self._remap(results, x0, y0, x1 - x0, y1 - y0, width, height)
+                self._update(results, width, height)
+                return results
+            # hand left the window, search the whole frame right away
+            self.lost += 1
+            self.roi = None
+
+        results = self._process(image)
+        self.full_frames += 1
+        if results.multi_hand_landmarks:
+            self._update(results, width, height)
+        return results
+
+    def _remap(self, results, x0, y0, crop_width, crop_height, width, height):
+        scale_x, scale_y = crop_width / width, crop_height / height
+        offset_x, offset_y = x0 / width, y0 / height
+        for hand_landmarks in results.multi_hand_landmarks:
+            for landmark in hand_landmarks.landmark:
+                landmark.x = landmark.x * scale_x + offset_x
+                landmark.y = landmark.y * scale_y + offset_y
+
+    def _update(self, results, width, height):
+        points = np.concatenate([landmarks_to_array(hand_landmarks) for
+                                 hand_landmarks in results.multi_hand_landmarks])
+        points = points * (width, height)
+        box_min, box_max = points.min(axis=0), points.max(axis=0)
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            inset_x = self.recenter_margin * (x1 - x0)
+            inset_y = self.recenter_margin * (y1 - y0)
+            if (box_min >= (x0 + inset_x, y0 + inset_y)).all() and \
+                    (box_max <= (x1 - inset_x, y1 - inset_y)).all():
+                return
+
+        center = (box_min + box_max) / 2
+        size = (box_max - box_min).max() * (1 + 2 * self.margin)
+        if size * size > self.max_area * width * height:
+            self.roi = None
+            return
+
+        # square window, clamped inside the frame
+        half = size / 2
+        x0 = int(np.clip(center[0] - half, 0, max(width - size, 0)))
+        y0 = int(np.clip(center[1] - half, 0, max(height - size, 0)))
+        x1 = min(int(x0 + size), width)
+        y1 = min(int(y0 + size), height)
+        self.roi = (x0, y0, x1, y1)
+
+    def metrics(self):
+        return {
+            'roi': self.roi,
+            'roi_frames': self.roi_frames,
+            'full_frames': self.full_frames,
+            'lost': self.lost,
+        }
@@ -0,0 +1,82 @@
+import time
+from collections import deque
+
+IDLE = 'idle'
+ACQUIRING = 'acquiring'
+TRACKING = 'tracking'
+STATES = (IDLE, ACQUIRING, TRACKING)
+
+
+class InferenceScheduler(object):
+    def __init__(self, process, idle_fps=2.0, acquire_timeout=2.0,
+                 rate_window=2.0, clock=time.perf_counter):
+        self._process = process
+        self._clock = clock
+        self.idle_interval = 1.0 / idle_fps
+        self.acquire_timeout = acquire_timeout
+        self.rate_window = rate_window
+
+        self.state = IDLE
+        self._last_inference = None
+        self._last_hand = None
+        self._inference_times = deque()
+
+        self.frames = 0
+        self.inferences = 0
+        self.skipped = 0
+
+    def _due(self, now):
+        if self.state != IDLE or self._last_inference is None:
+            return True
+        return now - self._last_inference >= self.idle_interval
+
+    def process(self, image):
+        now = self._clock()
+        self.frames += 1
+        if not self._due(now):
+            self.skipped += 1
+            return None
+
+        results = self._process(image)
+        self.inferences += 1
+        self._last_inference = now
+        self._inference_times.append(now)
+        self._prune(now)
+
+        if results.multi_hand_landmarks:
+            self.state = TRACKING
+            self._last_hand = now
+        elif self.state == TRACKING:
+            # lost the hand, keep searching at full rate for a while
+            self.state = ACQUIRING
+        elif self.state == ACQUIRING and \
+                now - self._last_hand >= self.acquire_timeout:
+            self.state = IDLE
+
+        return results
+
+    def _prune(self, now):
+        horizon = now - self.rate_window
+        while self._inference_times and self._inference_times[0] < horizon:
+            self._inference_times.popleft()
+
+    @property
+    def effective_rate(self):
+        self._prune(self._clock())
+        return len(self._inference_times) / self.rate_window
+
+    def metrics(self):
+        return {
+            'state': self.state,
+            'inference_rate': self.effective_rate,
+            'frames': self.frames,
+            'inferences': self.inferences,
+            'skipped': self.skipped,
+        }
+
+    def metrics_text(self):
+        return ('{state} {inference_rate:.1f}/s  inferred {inferences} of '
+                '{frames} frames, skipped {skipped}'.format(**self.metrics()))
+
+    def status_text(self):
+        return 'INFER:{} {:.1f}/s'.format(self.state, self.effective_rate)
@@ -0,0 +1,91 @@
+import os
+import signal
+import socket
+import sys
+import threading
+
+
+class StopSignal(object):
+    def __init__(self, control_socket=None,
+                 signals=(signal.SIGINT, signal.SIGTERM)):
+        self._event = threading.Event()
+        for signum in signals:
+            signal.signal(signum, self._handle_signal)
+
+        self.control_socket = control_socket
+        self._server = None
+        self._thread = None
+        if control_socket is not None:
+            self._server = self._listen(control_socket)
+            self._thread = threading.Thread(target=self._serve,
+                                            args=(self._server,), daemon=True)
+            self._thread.start()
+
+    def _handle_signal(self, signum, frame):
+        self._event.set()
+
+    def _listen(self, path):
+        if os.path.exists(path):
+            os.unlink(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen(1)
+        server.settimeout(0.5)
+        return server
+
+    def _serve(self, server):
+        # the socket is passed in, close() clears self._server under us
+        while not self._event.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with conn:
+                conn.settimeout(1.0)
+                try:
+                    command = conn.recv(64).strip().lower()
+                    if command == b'stop':
+                        self._event.set()
+                        conn.sendall(b'stopping\n')
+                    elif command == b'status':
+                        conn.sendall(b'running\n')
+                    else:
+                        conn.sendall(b'unknown command\n')
+                except OSError:
+                    continue
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def set(self):
+        self._event.set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def close(self):
+        self._event.set()
+        if self._server is not None:
+            self._server.close()
+            if (self._thread is not None and
+                    self._thread is not threading.current_thread()):
+                # accept() times out every 0.5 s and then sees the event
+                self._thread.join(timeout=2.0)
+            self._thread = None
+            self._server = None
+            if os.path.exists(self.control_socket):
+                os.unlink(self.control_socket)
+
+
+def send_control(path, command='stop'):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(2.0)
+        conn.connect(path)
+        conn.sendall(command.encode() + b'\n')
+        return conn.recv(64).decode().strip()
+
+
+if __name__ == '__main__':
+    print(send_control(*sys.argv[1:3]))
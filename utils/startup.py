@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StartupTimeline(object):
+    def __init__(self, start=None):
+        # start: a perf_counter() taken at the top of the entry script, so
+        # the imports before the timeline existed are counted too
+        self._lock = threading.Lock()
+        self.phases = []
+        self.marks = []
+        if start is None:
+            self._start = time.perf_counter()
+        else:
+            self._start = start
+            self.phases.append(('imports', 0.0, self.elapsed_ms()))
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._start) * 1000.0
+
+    @contextmanager
+    def phase(self, name):
+        begin = self.elapsed_ms()
+        try:
+            yield
+        finally:
+            end = self.elapsed_ms()
+            with self._lock:
+                self.phases.append((name, begin, end))
+
+    def mark(self, name):
+        elapsed = self.elapsed_ms()
+        with self._lock:
+            self.marks.append((name, elapsed))
+        return elapsed
+
+    def mark_once(self, name):
+        with self._lock:
+            if any(mark[0] == name for mark in self.marks):
+                return False
+        self.mark(name)
+        return True
+
+    def report(self):
+        lines = ['startup timeline (ms)']
+        for name, begin, end in sorted(self.phases, key=lambda p: p[1]):
+            lines.append('  {:<16}{:>9.1f} -> {:>9.1f}  ({:.1f})'.format(
+                name, begin, end, end - begin))
+        for name, elapsed in self.marks:
+            lines.append('  {:<16}{:>9.1f}'.format(name, elapsed))
+        return '\n'.join(lines)
+
+
+def run_parallel(timeline, tasks):
+    def run(name, task):
+        with timeline.phase(name):
+            return task()
+
+    # leaving the with block waits for every task, failed or not
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = [executor.submit(run, name, task) for name, task in tasks]
+
+    failed = [future for future in futures
+              if future.exception() is not None]
+    if failed:
+        # the caller never sees the ones that worked, let go of them here
+        for future in futures:
+            if future.exception() is None:
+                _release(future.result())
+        failed[0].result()
+    return [future.result() for future in futures]
+
+
+def _release(resource):
+    # cameras have release(), mediapipe Hands and the players close()
+    for name in ('release', 'close'):
+        method = getattr(resource, name, None)
+        if callable(method):
+            try:
+                method()
+            except Exception:
+                pass
+            return
+
+
+def create_hands(static_image_mode=False, max_num_hands=1,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 warmup_shape=(540, 960, 3)):
+    # mediapipe is by far the slowest import, keep it off the main path
+    import mediapipe as mp
+
+    hands = mp.solutions.hands.Hands(
+        static_image_mode=static_image_mode,
+        max_num_hands=max_num_hands,
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence,
+    )
+
+    # the first process() call initializes the graph, pay for it now
+    if warmup_shape is not None:
+        hands.process(np.zeros(warmup_shape, dtype=np.uint8))
+
+    return hands
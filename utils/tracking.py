@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class HandTracker(object):
+    def __init__(self, max_distance=0.2, max_missing=10):
+        # largest move of the palm centre between two inferred frames, in
+        # normalized image coordinates
+        self.max_distance = max_distance
+        # inferred frames a hand may be missing before its id is dropped
+        self.max_missing = max_missing
+
+        self.tracks = {}
+        self.expired = []
+        self._next_id = 0
+
+    def update(self, points):
+        centres = np.asarray(points).mean(axis=-2)
+        hand_ids = [None] * len(centres)
+        track_ids = list(self.tracks)
+
+        if track_ids and len(centres):
+            previous = np.array([self.tracks[track_id][0] for
+                                 track_id in track_ids])
+            distances = np.linalg.norm(
+                previous[:, None, :] - centres[None, :, :], axis=-1)
+            matched = set()
+            # greedy, closest pairs first
+            for flat in distances.argsort(axis=None):
+                row, col = divmod(int(flat), len(centres))
+                if distances[row, col] > self.max_distance:
+                    break
+                if hand_ids[col] is not None or row in matched:
+                    continue
+                hand_ids[col] = track_ids[row]
+                matched.add(row)
+
+        for index, hand_id in enumerate(hand_ids):
+            if hand_id is None:
+                hand_id = hand_ids[index] = self._next_id
+                self._next_id += 1
+            self.tracks[hand_id] = [centres[index], 0]
+
+        self.expired = []
+        seen = set(hand_ids)
+        for track_id in track_ids:
+            if track_id in seen:
+                continue
+            track = self.tracks[track_id]
+            track[1] += 1
+            if track[1] > self.max_missing:
+                del self.tracks[track_id]
+                self.expired.append(track_id)
+
+        return hand_ids
+
+    def reset(self):
+        self.expired = list(self.tracks)
+        self.tracks.clear()